@@ -98,9 +98,25 @@ def _load_nodes():
                     traceback.print_exc()
                     failed_count += 1
     
+    _start_warmup()
+    
     return loaded_count, failed_count
 
 
+def _start_warmup():
+    """
+    Start background warm-up of frequently used models.
+    
+    Runs in a daemon thread so plugin initialization is never delayed;
+    disabled unless WarmUp.enabled is set in config.json.
+    """
+    try:
+        from .nodes.common.usage_log import start_warmup
+        start_warmup()
+    except Exception as e:
+        print(f"[A1rSpace] Warning: Failed to start warm-up: {e}")
+
+
 def _register_api_routes():
     """Register custom API routes for image saving, filtering, etc."""
     try:
@@ -111,6 +127,16 @@ def _register_api_routes():
         traceback.print_exc()
 
 
+def _install_queue_scheduler():
+    """Install the opt-in checkpoint-affinity scheduler on the prompt queue."""
+    try:
+        import server
+        from .nodes.common.queue_scheduler import install
+        install(server.PromptServer.instance.prompt_queue)
+    except Exception as e:
+        print(f"[A1rSpace] Warning: Failed to install queue scheduler: {e}")
+
+
 def _check_optional_dependencies():
     """
     Check optional dependencies and print installation hints.
@@ -153,6 +179,7 @@ try:
     
     loaded_count, failed_count = _load_nodes()
     _register_api_routes()
+    _install_queue_scheduler()
     
     # Check optional dependencies (only warn, don't fail)
     try:
@@ -3,6 +3,7 @@ API routes for A1rSpace ComfyUI extension.
 
 Provides endpoints for canvas configuration, image filtering, and user decision handling.
 """
+import asyncio
 import os
 import shutil
 import time
@@ -301,15 +302,27 @@ async def save_api_config(request):
         
         from .nodes.common.config_loader import _config_path
         
-        if _config_path and os.path.exists(_config_path):
-             with open(_config_path, "w", encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
-        else:
+        if not (_config_path and os.path.exists(_config_path)):
              # If _config_path is not set (load_config not called yet), calculate it
              plugin_base_path = os.path.abspath(os.path.join(os.path.dirname(__file__)))
              config_path = os.path.join(plugin_base_path, "config.json")
-             with open(config_path, "w", encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+        else:
+             config_path = _config_path
+
+        # Merge into the existing file so sections not edited by the
+        # API dialog (cache and performance settings) are preserved
+        merged = {}
+        if os.path.exists(config_path):
+             try:
+                with open(config_path, "r", encoding='utf-8') as f:
+                    merged = json.load(f)
+             except Exception:
+                merged = {}
+        merged.update(data)
+        merged.pop("base_path", None)
+
+        with open(config_path, "w", encoding='utf-8') as f:
+            json.dump(merged, f, indent=4, ensure_ascii=False)
         
         # Reload config cache
         from .nodes.common.config_loader import reload_config
@@ -318,3 +331,49 @@ async def save_api_config(request):
         return web.json_response({"success": True})
     except Exception as e:
         return web.json_response({"error": str(e)}, status=500)
+
+@server.PromptServer.instance.routes.post("/a1rspace/convert_checkpoints")
+async def convert_checkpoints(request):
+    """
+    Convert pickle checkpoints into the pruned safetensors cache.
+
+    Body may contain {"names": [...]} with checkpoint names; all pickle
+    checkpoints are converted when omitted. Runs off the event loop.
+    """
+    try:
+        try:
+            data = await request.json()
+        except Exception:
+            data = {}
+        names = data.get("names") if isinstance(data, dict) else None
+
+        from .nodes.common import ckpt_converter
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, ckpt_converter.convert_all, names)
+
+        return web.json_response({"success": True, "results": results})
+    except Exception as e:
+        traceback.print_exc()
+        return web.json_response({"error": str(e)}, status=500)
+
+@server.PromptServer.instance.routes.get("/a1rspace/memory")
+async def get_memory_report(request):
+    """
+    Report memory usage of every A1rSpace cache and the global budgets.
+    """
+    try:
+        from .nodes.common.memory_budget import memory_report
+        return web.json_response(memory_report())
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=500)
+
+@server.PromptServer.instance.routes.get("/a1rspace/stats")
+async def get_sampling_stats(request):
+    """
+    Report the rolling summary of sampling timings (SamplingStats.enabled).
+    """
+    try:
+        from .nodes.common import sampling_stats
+        return web.json_response(sampling_stats.summary())
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=500)
@@ -0,0 +1,123 @@
+"""
+Benchmark for the parallel safetensors reader.
+
+Measures read throughput of nodes.common.parallel_reader against file size
+and thread count, with safetensors.torch.load_file as the single-threaded
+baseline.
+
+Usage (from the plugin folder):
+    python benchmarks/bench_parallel_read.py --sizes-mb 512 2048 --threads 1 2 4 8 16
+    python benchmarks/bench_parallel_read.py --file /models/checkpoints/model.safetensors
+
+Synthetic files are written to --dir (default: a temp folder) and removed
+afterwards. Between runs the file is evicted from the page cache with
+posix_fadvise(DONTNEED) where the platform supports it; otherwise later
+runs measure memory bandwidth rather than disk bandwidth.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import torch
+
+from nodes.common.parallel_reader import read_safetensors_parallel
+
+
+def _write_synthetic(path, size_mb, tensor_mb=64):
+    """Write a safetensors file of roughly size_mb made of fp16 tensors."""
+    from safetensors.torch import save_file
+
+    elements = tensor_mb * 1024 * 1024 // 2
+    count = max(1, size_mb // tensor_mb)
+    sd = {f"model.layer_{i}.weight": torch.randn(elements, dtype=torch.float16) for i in range(count)}
+    save_file(sd, path)
+
+
+def _drop_cache(path):
+    """Best-effort eviction of a file from the OS page cache."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        return True
+    finally:
+        os.close(fd)
+
+
+def _timed(fn, path, repeat):
+    """Run fn(path) repeat times with cold cache, return best seconds."""
+    best = None
+    for _ in range(repeat):
+        _drop_cache(path)
+        start = time.perf_counter()
+        sd = fn(path)
+        elapsed = time.perf_counter() - start
+        del sd
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_file(path, threads_list, chunk_mb, repeat):
+    """Benchmark one file for every thread count."""
+    size = os.path.getsize(path)
+    size_mb = size / (1024 * 1024)
+    rows = []
+
+    try:
+        from safetensors.torch import load_file
+        seconds = _timed(lambda p: load_file(p, device="cpu"), path, repeat)
+        rows.append({"file_mb": round(size_mb, 1), "reader": "safetensors", "threads": 1,
+                     "seconds": round(seconds, 4), "mb_per_s": round(size_mb / seconds, 1)})
+    except ImportError:
+        pass
+
+    for threads in threads_list:
+        fn = lambda p: read_safetensors_parallel(p, threads=threads, chunk_size=chunk_mb * 1024 * 1024)[0]
+        seconds = _timed(fn, path, repeat)
+        rows.append({"file_mb": round(size_mb, 1), "reader": "parallel", "threads": threads,
+                     "seconds": round(seconds, 4), "mb_per_s": round(size_mb / seconds, 1)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel safetensors read benchmark")
+    parser.add_argument("--file", nargs="*", default=[], help="Existing .safetensors files to benchmark")
+    parser.add_argument("--sizes-mb", nargs="*", type=int, default=[256, 1024], help="Synthetic file sizes")
+    parser.add_argument("--threads", nargs="*", type=int, default=[1, 2, 4, 8, 16])
+    parser.add_argument("--chunk-mb", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dir", default=None, help="Folder for synthetic files")
+    parser.add_argument("--json", default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    rows = []
+    for path in args.file:
+        rows.extend(bench_file(path, args.threads, args.chunk_mb, args.repeat))
+
+    if not args.file:
+        work_dir = args.dir or tempfile.mkdtemp(prefix="a1r_bench_")
+        for size_mb in args.sizes_mb:
+            path = os.path.join(work_dir, f"synthetic_{size_mb}mb.safetensors")
+            _write_synthetic(path, size_mb)
+            try:
+                rows.extend(bench_file(path, args.threads, args.chunk_mb, args.repeat))
+            finally:
+                os.remove(path)
+
+    print(f"{'file_mb':>9} {'reader':>12} {'threads':>8} {'seconds':>9} {'MB/s':>9}")
+    for r in rows:
+        print(f"{r['file_mb']:>9} {r['reader']:>12} {r['threads']:>8} {r['seconds']:>9} {r['mb_per_s']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
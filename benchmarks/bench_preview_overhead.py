@@ -0,0 +1,103 @@
+"""
+Benchmark for the per-step cost of Latent Observer previews.
+
+Simulates a sampling loop whose steps take --step-ms, with a preview job
+per step that converts a latent-sized RGB tensor to a JPEG with PIL and
+"sends" it with --send-ms of simulated websocket latency. Compares running
+the job inline on the sampling thread with handing it to PreviewWorker,
+and reports the time added to each step plus delivered/dropped frames.
+
+Usage (from the plugin folder):
+    python benchmarks/bench_preview_overhead.py
+    python benchmarks/bench_preview_overhead.py --step-ms 20 60 --preview-size 512 --json preview.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from PIL import Image
+
+from nodes.common.preview_worker import PreviewWorker
+
+
+def _busy_wait(seconds):
+    """Stand-in for model work that holds the sampling thread."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def _make_job(frame, send_ms, delivered):
+    def job():
+        image = Image.fromarray(frame)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=95)
+        time.sleep(send_ms / 1000.0)
+        delivered.append(buffer.tell())
+    return job
+
+
+def run(mode, steps, step_ms, send_ms, preview_size):
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (preview_size, preview_size, 3), dtype=np.uint8) for _ in range(4)]
+    delivered = []
+    worker = PreviewWorker(name="bench-preview") if mode == "worker" else None
+
+    start = time.perf_counter()
+    for step in range(steps):
+        _busy_wait(step_ms / 1000.0)
+        job = _make_job(frames[step % len(frames)], send_ms, delivered)
+        if worker is not None:
+            worker.submit(job)
+        else:
+            job()
+    sampling = time.perf_counter() - start
+    if worker is not None:
+        worker.wait_idle(timeout=10)
+
+    overhead = sampling - steps * step_ms / 1000.0
+    return {
+        "mode": mode,
+        "steps": steps,
+        "step_ms": step_ms,
+        "send_ms": send_ms,
+        "preview_size": preview_size,
+        "sampling_s": round(sampling, 4),
+        "overhead_per_step_ms": round(overhead / steps * 1000, 3),
+        "frames_delivered": len(delivered),
+        "frames_dropped": worker.dropped if worker is not None else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preview encode overhead: inline vs background worker")
+    parser.add_argument("--steps", type=int, default=30)
+    parser.add_argument("--step-ms", nargs="*", type=float, default=[10, 50])
+    parser.add_argument("--send-ms", type=float, default=2.0)
+    parser.add_argument("--preview-size", type=int, default=512)
+    parser.add_argument("--json", default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    rows = []
+    for step_ms in args.step_ms:
+        for mode in ("inline", "worker"):
+            rows.append(run(mode, args.steps, step_ms, args.send_ms, args.preview_size))
+
+    print(f"{'mode':>8} {'step_ms':>8} {'overhead/step ms':>17} {'delivered':>10} {'dropped':>8}")
+    for r in rows:
+        print(f"{r['mode']:>8} {r['step_ms']:>8} {r['overhead_per_step_ms']:>17} "
+              f"{r['frames_delivered']:>10} {r['frames_dropped']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
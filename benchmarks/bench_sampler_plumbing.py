@@ -0,0 +1,266 @@
+"""
+Benchmark for the sampling plumbing around UnityKSampler.
+
+Drives UnityKSampler.sample and common_ksampler on CPU with a tiny
+deterministic stand-in model and stub comfy / latent_preview modules, so
+the time A1rSpace spends around the model (latent preparation, upscale,
+noise, callbacks, caches) can be measured without a GPU or checkpoint.
+The stand-in model's own time is reported separately; "overhead_ms" is
+everything else.
+
+Usage (from the plugin folder):
+    python benchmarks/bench_sampler_plumbing.py
+    python benchmarks/bench_sampler_plumbing.py --resolutions 512 1024 2048 --batches 1 4 --json before.json
+
+Results are deterministic for a given grid, so two JSON files from before
+and after a change can be compared directly.
+"""
+import os
+import sys
+import json
+import time
+import types
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import torch
+import torch.nn.functional as F
+
+MODES = ["text to image", "image to image", "latent upscale", "hires fix"]
+
+
+# ========== Stand-in model ==========
+
+class _LatentFormat:
+    latent_channels = 4
+    scale_factor = 0.18215
+
+
+class _StandInModel:
+    """Fixed 3x3 convolution predicting x0, with its time accounted separately."""
+
+    def __init__(self, channels=4):
+        generator = torch.Generator().manual_seed(0)
+        self.weight = torch.randn(channels, channels, 3, 3, generator=generator) * 0.05
+        self.latent_format = _LatentFormat()
+        self.model_time = 0.0
+        self.calls = 0
+
+    def apply_model(self, x, timestep, **kwargs):
+        start = time.perf_counter()
+        out = x - F.conv2d(x, self.weight, padding=1) * timestep.view(-1, 1, 1, 1)
+        self.model_time += time.perf_counter() - start
+        self.calls += 1
+        return out
+
+    def process_latent_in(self, latent):
+        return latent * self.latent_format.scale_factor
+
+    def process_latent_out(self, latent):
+        return latent / self.latent_format.scale_factor
+
+    def memory_required(self, shape):
+        return 0
+
+
+class _StandInPatcher:
+    """Minimal ModelPatcher surface used by the sampler code."""
+
+    def __init__(self, model=None, model_options=None):
+        self.model = model or _StandInModel()
+        self.model_options = dict(model_options or {})
+        self.load_device = torch.device("cpu")
+        self.patches = {}
+        self.patches_uuid = "bench"
+
+    def clone(self):
+        return _StandInPatcher(self.model, self.model_options)
+
+    def set_model_unet_function_wrapper(self, wrapper):
+        self.model_options["model_function_wrapper"] = wrapper
+
+    def get_model_object(self, name):
+        if name == "latent_format":
+            return self.model.latent_format
+        raise AttributeError(name)
+
+    def model_size(self):
+        return 0
+
+
+class _StandInVAE:
+    def encode(self, pixels):
+        x = pixels.movedim(-1, 1)
+        x = F.avg_pool2d(x, 8)
+        return torch.cat([x, x.mean(dim=1, keepdim=True)], dim=1)
+
+
+# ========== Stub comfy modules ==========
+
+def _prepare_noise(latent_image, seed, noise_inds=None):
+    generator = torch.manual_seed(seed)
+    return torch.randn(latent_image.size(), dtype=latent_image.dtype, layout=latent_image.layout,
+                       generator=generator, device="cpu")
+
+
+def _sample(model, noise, steps, cfg, sampler_name, scheduler, positive, negative, latent_image,
+            denoise=1.0, disable_noise=False, start_step=None, last_step=None, force_full_denoise=False,
+            noise_mask=None, callback=None, disable_pbar=False, seed=None):
+    """Euler sampling over a linear sigma schedule, calling the stand-in model."""
+    inner = model.model
+    total = max(1, int(steps / max(denoise, 1e-3)))
+    sigmas = torch.linspace(1.0, 0.0, total + 1)[-(steps + 1):]
+    sigmas = sigmas[start_step or 0:(last_step + 1) if last_step is not None else None]
+
+    x = inner.process_latent_in(latent_image.float()) + noise.float() * sigmas[0]
+    wrapper = model.model_options.get("model_function_wrapper")
+    for i in range(len(sigmas) - 1):
+        sigma = sigmas[i].expand(x.shape[0])
+        args = {"input": x, "timestep": sigma, "c": {}, "cond_or_uncond": [0]}
+        x0 = wrapper(inner.apply_model, args) if wrapper else inner.apply_model(x, sigma)
+        if callback is not None:
+            callback(i, x0, x, len(sigmas) - 1)
+        x = x0 + (x - x0) * (sigmas[i + 1] / sigmas[i].clamp_min(1e-6))
+    return inner.process_latent_out(x)
+
+
+def _common_upscale(samples, width, height, upscale_method, crop):
+    mode = "bilinear" if upscale_method == "bislerp" else upscale_method
+    return F.interpolate(samples, size=(height, width), mode=mode)
+
+
+def install_stubs():
+    """Register stub comfy, latent_preview and folder_paths modules."""
+    comfy = types.ModuleType("comfy")
+    sample = types.ModuleType("comfy.sample")
+    sample.prepare_noise = _prepare_noise
+    sample.fix_empty_latent_channels = lambda model, latent: latent
+    sample.sample = _sample
+
+    mm = types.ModuleType("comfy.model_management")
+    mm.intermediate_device = lambda: torch.device("cpu")
+    mm.get_free_memory = lambda device=None: 64 * 1024 ** 3
+    mm.soft_empty_cache = lambda *args, **kwargs: None
+    mm.free_memory = lambda *args, **kwargs: None
+    mm.unload_all_models = lambda *args, **kwargs: None
+    mm.OOM_EXCEPTION = MemoryError
+
+    utils = types.ModuleType("comfy.utils")
+    utils.PROGRESS_BAR_ENABLED = False
+    utils.common_upscale = _common_upscale
+
+    comfy.sample, comfy.model_management, comfy.utils = sample, mm, utils
+
+    latent_preview = types.ModuleType("latent_preview")
+    latent_preview.prepare_callback = lambda model, steps, x0_output_dict=None: (lambda step, x0, x, total: None)
+
+    folder_paths = types.ModuleType("folder_paths")
+    folder_paths.get_filename_list = lambda name: []
+
+    sys.modules.update({
+        "comfy": comfy,
+        "comfy.sample": sample,
+        "comfy.model_management": mm,
+        "comfy.utils": utils,
+        "latent_preview": latent_preview,
+        "folder_paths": folder_paths,
+    })
+
+
+# ========== Benchmark ==========
+
+def _inputs(mode, resolution, batch):
+    """Node inputs for one grid point."""
+    kwargs = {"width": resolution, "height": resolution, "batch_size": batch}
+    if mode == "image to image":
+        generator = torch.Generator().manual_seed(1)
+        kwargs["pixels"] = torch.rand(1, resolution, resolution, 3, generator=generator)
+        kwargs["vae"] = _StandInVAE()
+    elif mode == "latent upscale":
+        generator = torch.Generator().manual_seed(2)
+        size = resolution // 8
+        kwargs["latent"] = {"samples": torch.randn(batch, 4, size, size, generator=generator)}
+        kwargs["upscale_by"] = 1.5
+    elif mode == "hires fix":
+        kwargs["upscale_by"] = 1.5
+    return kwargs
+
+
+def bench_node(node, mode, resolution, batch, steps, repeat):
+    """Time UnityKSampler.sample, return the best run."""
+    best = None
+    for _ in range(repeat):
+        model = _StandInPatcher()
+        start = time.perf_counter()
+        node.sample(mode, model, [], [], "euler", "normal", 0, steps, 7.0, 0.6, **_inputs(mode, resolution, batch))
+        total = time.perf_counter() - start
+        row = {
+            "target": "UnityKSampler.sample", "mode": mode, "resolution": resolution, "batch": batch,
+            "steps": steps, "total_ms": round(total * 1000, 3),
+            "model_ms": round(model.model.model_time * 1000, 3),
+            "overhead_ms": round((total - model.model.model_time) * 1000, 3),
+            "model_calls": model.model.calls,
+        }
+        if best is None or row["total_ms"] < best["total_ms"]:
+            best = row
+    return best
+
+
+def bench_common_ksampler(common_ksampler, resolution, batch, steps, repeat):
+    """Time common_ksampler on a prepared latent, return the best run."""
+    best = None
+    size = resolution // 8
+    for _ in range(repeat):
+        model = _StandInPatcher()
+        latent = {"samples": torch.zeros(batch, 4, size, size)}
+        start = time.perf_counter()
+        common_ksampler(model, 0, steps, 7.0, "euler", "normal", [], [], latent, denoise=1.0)
+        total = time.perf_counter() - start
+        row = {
+            "target": "common_ksampler", "mode": None, "resolution": resolution, "batch": batch,
+            "steps": steps, "total_ms": round(total * 1000, 3),
+            "model_ms": round(model.model.model_time * 1000, 3),
+            "overhead_ms": round((total - model.model.model_time) * 1000, 3),
+            "model_calls": model.model.calls,
+        }
+        if best is None or row["total_ms"] < best["total_ms"]:
+            best = row
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UnityKSampler plumbing benchmark with a stand-in model")
+    parser.add_argument("--modes", nargs="*", default=MODES, choices=MODES)
+    parser.add_argument("--resolutions", nargs="*", type=int, default=[512, 1024])
+    parser.add_argument("--batches", nargs="*", type=int, default=[1, 4])
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=1, help="torch CPU threads, fixed for comparable runs")
+    parser.add_argument("--json", default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    install_stubs()
+    from nodes.samplers.unity_ksampler import UnityKSampler, common_ksampler
+
+    node = UnityKSampler()
+    rows = []
+    for resolution in args.resolutions:
+        for batch in args.batches:
+            rows.append(bench_common_ksampler(common_ksampler, resolution, batch, args.steps, args.repeat))
+            for mode in args.modes:
+                rows.append(bench_node(node, mode, resolution, batch, args.steps, args.repeat))
+
+    print(f"{'target':>22} {'mode':>15} {'res':>6} {'batch':>6} {'total_ms':>10} {'model_ms':>10} {'overhead_ms':>12}")
+    for r in rows:
+        print(f"{r['target']:>22} {str(r['mode']):>15} {r['resolution']:>6} {r['batch']:>6} "
+              f"{r['total_ms']:>10} {r['model_ms']:>10} {r['overhead_ms']:>12}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"torch": torch.__version__, "threads": args.threads, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
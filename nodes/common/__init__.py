@@ -6,7 +6,7 @@ This package provides shared utilities, configuration loaders, and helper classe
 used across multiple node modules to reduce code duplication and improve performance.
 """
 
-from .config_loader import load_config, AlwaysEqual
+from .config_loader import load_config, get_setting, AlwaysEqual
 from .shared_utils import (
     to_int, to_float, print_log,
     ModelList, NumericConfig, UpscaleMethods, TextCleanerMixin
@@ -14,6 +14,7 @@ from .shared_utils import (
 
 __all__ = [
     'load_config',
+    'get_setting',
     'AlwaysEqual',
     'to_int',
     'to_float',
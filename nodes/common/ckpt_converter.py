@@ -0,0 +1,256 @@
+"""
+Checkpoint conversion cache for ComfyUI A1rSpace extension.
+
+Legacy pickle-based checkpoints (.ckpt/.pt/.pth) are slow to deserialize,
+cannot be memory-mapped and frequently carry EMA or optimizer weights that
+inference never touches. This module writes a pruned fp16 safetensors copy
+of such files into a managed cache directory once, and resolves later loads
+to that copy transparently.
+
+Cached copies are named after the source file plus a fingerprint of its
+path, size and modification time, so replacing a checkpoint on disk simply
+misses the cache and triggers a fresh conversion.
+"""
+import os
+import hashlib
+import threading
+
+from .config_loader import get_setting
+
+# Extensions handled by the converter (everything torch.load understands)
+PICKLE_EXTENSIONS = (".ckpt", ".pt", ".pth", ".bin")
+
+# State dict prefixes that are never used for inference
+PRUNE_PREFIXES = ("model_ema.", "optimizer.", "optimizer_states.", "lr_schedulers.")
+
+_lock = threading.Lock()
+_pending = {}
+
+# Lazy import to reduce startup overhead
+_folder_paths = None
+
+
+def _get_folder_paths():
+    """Lazy import folder_paths to reduce initial load time."""
+    global _folder_paths
+    if _folder_paths is None:
+        import folder_paths
+        _folder_paths = folder_paths
+    return _folder_paths
+
+
+def is_enabled():
+    """Return True when the conversion cache is enabled in config.json."""
+    return bool(get_setting("CheckpointCache", "enabled", False))
+
+
+def is_pickle_checkpoint(path):
+    """Return True for checkpoint files stored in a pickle-based format."""
+    return path.lower().endswith(PICKLE_EXTENSIONS)
+
+
+def cache_directory():
+    """
+    Get the managed cache directory, creating it on first use.
+
+    Defaults to ``cache/checkpoints`` inside the plugin folder and can be
+    overridden with ``CheckpointCache.directory`` in config.json.
+    """
+    directory = get_setting("CheckpointCache", "directory", "")
+    if not directory:
+        plugin_base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+        directory = os.path.join(plugin_base_path, "cache", "checkpoints")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _fingerprint(path):
+    """Build a short identity hash from path, size and mtime."""
+    st = os.stat(path)
+    source = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+
+def _stem(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def cached_path_for(ckpt_path):
+    """
+    Get the cache location for a checkpoint without converting it.
+
+    Args:
+        ckpt_path (str): Full path of the source checkpoint
+
+    Returns:
+        str: Full path of the (possibly not yet existing) safetensors copy
+    """
+    filename = f"{_stem(ckpt_path)}-{_fingerprint(ckpt_path)}.safetensors"
+    return os.path.join(cache_directory(), filename)
+
+
+def prune_state_dict(sd, half=True):
+    """
+    Drop training-only entries and optionally cast float tensors to fp16.
+
+    Args:
+        sd (dict): Source state dict
+        half (bool): Cast fp32/fp64 tensors to fp16
+
+    Returns:
+        tuple: (pruned state dict, number of dropped keys)
+    """
+    import torch
+
+    out = {}
+    dropped = 0
+    seen_storage = set()
+    for k, v in sd.items():
+        if not isinstance(v, torch.Tensor) or k.startswith(PRUNE_PREFIXES):
+            dropped += 1
+            continue
+        if half and v.dtype in (torch.float32, torch.float64):
+            v = v.to(torch.float16)
+        v = v.contiguous()
+        # safetensors refuses tensors that share storage (tied weights)
+        ptr = (v.data_ptr(), v.numel())
+        if ptr in seen_storage:
+            v = v.clone()
+        seen_storage.add(ptr)
+        out[k] = v
+    return out, dropped
+
+
+def _remove_stale_copies(ckpt_path, keep):
+    """Remove older conversions of the same checkpoint."""
+    prefix = _stem(ckpt_path) + "-"
+    directory = os.path.dirname(keep)
+    for filename in os.listdir(directory):
+        full = os.path.join(directory, filename)
+        if full == keep or not filename.startswith(prefix) or not filename.endswith(".safetensors"):
+            continue
+        # Fingerprints are fixed-length hex, guard against "name-v2" style stems
+        if len(filename) - len(prefix) != len("0123456789abcdef.safetensors"):
+            continue
+        try:
+            os.remove(full)
+        except OSError:
+            pass
+
+
+def convert_checkpoint(ckpt_path, half=None):
+    """
+    Convert a pickle checkpoint into a pruned safetensors copy.
+
+    Args:
+        ckpt_path (str): Full path of the source checkpoint
+        half (bool): Cast to fp16, defaults to ``CheckpointCache.fp16``
+
+    Returns:
+        str: Path of the converted file
+    """
+    import comfy.utils
+    from safetensors.torch import save_file
+
+    if half is None:
+        half = bool(get_setting("CheckpointCache", "fp16", True))
+
+    target = cached_path_for(ckpt_path)
+    if os.path.exists(target):
+        return target
+
+    sd = comfy.utils.load_torch_file(ckpt_path, safe_load=True)
+    pruned, dropped = prune_state_dict(sd, half=half)
+    del sd
+
+    tmp_path = target + ".tmp"
+    save_file(pruned, tmp_path, metadata={"format": "pt", "a1rspace_source": os.path.basename(ckpt_path)})
+    os.replace(tmp_path, target)
+    _remove_stale_copies(ckpt_path, target)
+
+    src_mb = os.path.getsize(ckpt_path) / (1024 * 1024)
+    dst_mb = os.path.getsize(target) / (1024 * 1024)
+    print(f"[A1rSpace] Converted {os.path.basename(ckpt_path)}: "
+          f"{src_mb:.0f} MB -> {dst_mb:.0f} MB, dropped {dropped} keys")
+    return target
+
+
+def _convert_once(ckpt_path):
+    """Convert a checkpoint, letting concurrent callers share one conversion."""
+    target = cached_path_for(ckpt_path)
+    if os.path.exists(target):
+        return target
+
+    with _lock:
+        event = _pending.get(target)
+        owner = event is None
+        if owner:
+            event = threading.Event()
+            _pending[target] = event
+
+    if not owner:
+        event.wait()
+        if not os.path.exists(target):
+            raise RuntimeError("concurrent conversion failed")
+        return target
+
+    try:
+        return convert_checkpoint(ckpt_path)
+    finally:
+        with _lock:
+            _pending.pop(target, None)
+        event.set()
+
+
+def resolve_checkpoint_path(ckpt_path):
+    """
+    Resolve a checkpoint path to its cached safetensors copy.
+
+    Non-pickle files are returned unchanged. Pickle checkpoints are converted
+    on first use; any conversion failure falls back to the original path.
+
+    Args:
+        ckpt_path (str): Full path of the checkpoint
+
+    Returns:
+        str: Path that should be passed to the loader
+    """
+    if not is_pickle_checkpoint(ckpt_path) or not is_enabled():
+        return ckpt_path
+
+    try:
+        return _convert_once(ckpt_path)
+    except Exception as e:
+        print(f"[A1rSpace] Checkpoint conversion failed for {os.path.basename(ckpt_path)}: {e}")
+        return ckpt_path
+
+
+def convert_all(names=None):
+    """
+    Convert checkpoints in bulk.
+
+    Args:
+        names (list): Checkpoint names as listed by ModelList.ckpt_list(),
+            all pickle checkpoints when empty
+
+    Returns:
+        list: One result dict per checkpoint with name, path and error
+    """
+    folder_paths = _get_folder_paths()
+    if not names:
+        names = [n for n in folder_paths.get_filename_list("checkpoints") if is_pickle_checkpoint(n)]
+
+    results = []
+    for name in names:
+        if not name or name == "None":
+            continue
+        try:
+            ckpt_path = folder_paths.get_full_path_or_raise("checkpoints", name)
+            if not is_pickle_checkpoint(ckpt_path):
+                results.append({"name": name, "path": ckpt_path, "error": None, "skipped": True})
+                continue
+            target = _convert_once(ckpt_path)
+            results.append({"name": name, "path": target, "error": None, "skipped": False})
+        except Exception as e:
+            results.append({"name": name, "path": None, "error": str(e), "skipped": False})
+    return results
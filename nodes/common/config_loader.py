@@ -65,6 +65,32 @@ def reload_config():
     return load_config()
 
 
+def get_setting(section, key, default=None):
+    """
+    Read a single value from a configuration section.
+
+    Missing sections, missing keys and unreadable configuration files all
+    fall back to the default, so callers can use this on hot paths without
+    guarding against a broken config.json.
+
+    Args:
+        section (str): Top-level section name (e.g. "CheckpointCache")
+        key (str): Key inside the section
+        default: Value returned when the setting is not present
+
+    Returns:
+        The configured value or default
+    """
+    try:
+        config_data = load_config()
+    except Exception:
+        return default
+    values = config_data.get(section)
+    if not isinstance(values, dict):
+        return default
+    return values.get(key, default)
+
+
 class AlwaysEqual(str):
     """
     Special string class that always returns True for equality comparisons.
@@ -0,0 +1,87 @@
+"""
+Streaming file hashes for ComfyUI A1rSpace extension.
+
+IS_CHANGED methods hash their input files on every prompt validation. This
+module reads files in fixed-size chunks into one reused buffer, so hashing
+never holds the whole file in memory, and memoizes digests by file identity
+(path, size, mtime_ns, inode). A file is only read again after it changes.
+
+Settings are read from the "FileHash" section of config.json
+(chunk_kb, max_entries).
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .config_loader import get_setting
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def file_identity(path):
+    """
+    Return the identity of a file as seen by the filesystem.
+
+    Args:
+        path (str): File path
+
+    Returns:
+        tuple: (real path, size, mtime_ns, inode)
+    """
+    real = os.path.realpath(path)
+    st = os.stat(real)
+    return real, st.st_size, st.st_mtime_ns, st.st_ino
+
+
+def _hash_stream(path, algorithm, chunk_size):
+    h = hashlib.new(algorithm)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def file_digest(path, algorithm="sha256"):
+    """
+    Hash a file, reusing the memoized digest while the file is unchanged.
+
+    Args:
+        path (str): File path
+        algorithm (str): hashlib algorithm name
+
+    Returns:
+        str: Hex digest
+    """
+    identity = file_identity(path)
+    key = (identity, algorithm)
+    with _memo_lock:
+        digest = _memo.get(key)
+        if digest is not None:
+            _memo.move_to_end(key)
+            return digest
+
+    chunk_size = max(64, int(get_setting("FileHash", "chunk_kb", 1024))) * 1024
+    digest = _hash_stream(identity[0], algorithm, chunk_size)
+
+    # Only memoize when the file did not change while it was read
+    if file_identity(path) == identity:
+        max_entries = max(1, int(get_setting("FileHash", "max_entries", 256)))
+        with _memo_lock:
+            _memo[key] = digest
+            _memo.move_to_end(key)
+            while len(_memo) > max_entries:
+                _memo.popitem(last=False)
+    return digest
+
+
+def clear_memo():
+    """Forget all memoized digests."""
+    with _memo_lock:
+        _memo.clear()
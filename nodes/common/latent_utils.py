@@ -0,0 +1,224 @@
+"""
+Latent tensor helpers for ComfyUI A1rSpace extension.
+
+Provides the shared empty-latent factory, copy-free batch replication,
+a VAE encode cache and memory-capped latent upscaling used by the sampling
+and transform nodes.
+"""
+import hashlib
+import weakref
+
+import torch
+
+from .config_loader import get_setting
+from .memory_budget import get_cache
+
+
+def latent_channels(model=None, default=4):
+    """
+    Get the channel count of a model's latent format.
+
+    Args:
+        model: ModelPatcher, or None when no model is available
+        default (int): Channel count used without a model
+
+    Returns:
+        int: Number of latent channels
+    """
+    if model is None:
+        return default
+    try:
+        return int(model.get_model_object("latent_format").latent_channels)
+    except Exception:
+        return default
+
+
+def empty_latent(batch_size, height, width, channels=4, dtype=torch.float32, device="cpu"):
+    """
+    Get an all-zero latent without allocating the full tensor.
+
+    The result is a stride-0 view over a single zero element, so it costs
+    the same for a batch of 1 and a batch of 64. It is meant for latents
+    that stay inside the sampler, which only reads them: noise is added
+    out of place and the sampled result is a fresh tensor. In-place writes
+    raise, so never return it as node output; use torch.zeros for latents
+    that leave the node.
+
+    Args:
+        batch_size (int): Batch size
+        height (int): Image height in pixels
+        width (int): Image width in pixels
+        channels (int): Latent channels, see latent_channels()
+        dtype: Tensor dtype
+        device: Tensor device
+
+    Returns:
+        torch.Tensor: Zero latent of shape [batch, channels, height // 8, width // 8]
+    """
+    shape = (int(batch_size), int(channels), int(height) // 8, int(width) // 8)
+    return torch.zeros((), dtype=dtype, device=device).expand(shape)
+
+
+def expand_to_batch(t, batch_size):
+    """
+    Repeat or trim a latent batch to batch_size.
+
+    A single latent is broadcast with expand(), which shares storage instead
+    of materializing batch_size copies; the samplers only read the input
+    latent. Larger batches fall back to repeat() because interleaved
+    repetition cannot be expressed as a view.
+
+    Args:
+        t: Latent tensor [B, C, H, W]
+        batch_size (int): Target batch size
+
+    Returns:
+        torch.Tensor: Latent with batch_size entries
+    """
+    current_batch = t.shape[0]
+    if batch_size <= current_batch:
+        return t[:batch_size]
+    if current_batch == 1:
+        return t.expand(batch_size, *t.shape[1:])
+    repeat_times = (batch_size + current_batch - 1) // current_batch
+    return t.repeat(repeat_times, *([1] * (t.ndim - 1)))[:batch_size]
+
+
+# ========== VAE Encode Cache ==========
+
+_encode_cache = get_cache("vae_encode", max_entries=8)
+
+
+def tensor_fingerprint(t):
+    """
+    Hash the shape, dtype and full contents of a tensor.
+
+    Hashing runs at memory bandwidth, which is far cheaper than the VAE
+    pass it guards.
+    """
+    data = t.detach()
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{tuple(data.shape)}|{data.dtype}".encode("utf-8"))
+    if data.numel() and not any(data.stride()):
+        # Expanded constants (empty_latent) are keyed by shape and their one
+        # element, without materializing the full tensor
+        h.update(b"|const")
+        data = data[(0,) * data.ndim].reshape(1)
+    if data.device.type != "cpu":
+        data = data.cpu()
+    data = data.contiguous()
+    h.update(memoryview(data.view(torch.uint8).reshape(-1).numpy()))
+    return h.hexdigest()
+
+
+def vae_encode_cached(vae, pixels):
+    """
+    Encode pixels with a VAE, reusing the latent of an identical earlier call.
+
+    Entries are keyed by the pixel fingerprint and the VAE object; a weak
+    reference guards against a new VAE reusing a freed object's id. The
+    cached latent is shared, callers must not modify it in place.
+
+    Args:
+        vae: ComfyUI VAE
+        pixels: Image tensor [B, H, W, C]
+
+    Returns:
+        torch.Tensor: Encoded latent
+    """
+    key = (id(vae), tensor_fingerprint(pixels))
+    cached = _encode_cache.get(key)
+    if cached is not None:
+        vae_ref, latent = cached
+        if vae_ref() is vae:
+            return latent
+
+    latent = vae.encode(pixels[:, :, :, :3])
+    _encode_cache.put(key, (weakref.ref(vae), latent))
+    return latent
+
+
+# ========== Chunked Upscale ==========
+
+def _nearest_rows(in_height, height, device):
+    """
+    Input row that each output row copies in a nearest-exact resize.
+
+    The map is read back from interpolate itself on a one-column probe, so
+    it is exactly the one the kernel uses on this device.
+    """
+    probe = torch.arange(in_height, dtype=torch.float32, device=device).view(1, 1, in_height, 1)
+    rows = torch.nn.functional.interpolate(probe, size=(height, 1), mode="nearest-exact")
+    return rows.view(height).long()
+
+
+def _upscale_rows(samples, width, height, cap):
+    """
+    Nearest-exact upscale in horizontal stripes that each fit the memory cap.
+
+    Nearest-exact picks every output row from exactly one input row, so
+    each stripe gathers its source rows first and only resizes the width.
+    Columns use the same map as the full call and rows map one to one, so
+    the result is bit-identical to a single call for any pair of sizes.
+    """
+    row_bytes = samples.shape[0] * samples.shape[1] * width * samples.element_size()
+    rows_per_stripe = max(1, cap // max(1, row_bytes))
+    rows = _nearest_rows(samples.shape[2], height, samples.device)
+
+    out = None
+    for r0 in range(0, height, rows_per_stripe):
+        r1 = min(height, r0 + rows_per_stripe)
+        stripe = torch.nn.functional.interpolate(
+            samples.index_select(2, rows[r0:r1]), size=(r1 - r0, width), mode="nearest-exact"
+        )
+        if out is None:
+            out = torch.empty(stripe.shape[:2] + (height, width), dtype=stripe.dtype, device=stripe.device)
+        out[:, :, r0:r1] = stripe
+    return out
+
+
+def chunked_upscale(samples, width, height, upscale_method, crop="disabled", max_chunk_mb=None):
+    """
+    comfy.utils.common_upscale with bounded peak memory.
+
+    The batch is upscaled in slices whose output fits max_chunk_mb. When a
+    single sample is still too large, nearest-exact without center crop is
+    further split into row stripes. Other modes are sliced by batch only,
+    so one sample is the smallest chunk. Every path is bit-identical to the
+    unchunked call.
+
+    Args:
+        samples: Latent tensor [B, C, H, W]
+        width (int): Target width
+        height (int): Target height
+        upscale_method (str): comfy.utils.common_upscale method
+        crop (str): "disabled" or "center"
+        max_chunk_mb (int): Output megabytes per chunk, LatentUpscale.chunk_mb when None, 0 disables
+
+    Returns:
+        torch.Tensor: Upscaled latent [B, C, height, width]
+    """
+    import comfy.utils
+
+    if max_chunk_mb is None:
+        max_chunk_mb = get_setting("LatentUpscale", "chunk_mb", 256)
+    cap = int(max_chunk_mb or 0) * 1024 * 1024
+    batch = samples.shape[0]
+    per_sample = samples.shape[1] * height * width * samples.element_size()
+    if not cap or samples.ndim != 4 or batch * per_sample <= cap:
+        return comfy.utils.common_upscale(samples, width, height, upscale_method, crop)
+
+    tile_rows = per_sample > cap and crop == "disabled" and upscale_method == "nearest-exact"
+    per_chunk = max(1, cap // per_sample)
+
+    out = None
+    for start in range(0, batch, per_chunk):
+        part = samples[start:start + per_chunk]
+        if tile_rows:
+            part = _upscale_rows(part, width, height, cap)
+        else:
+            part = comfy.utils.common_upscale(part, width, height, upscale_method, crop)
+        if out is None:
+            out = torch.empty((batch,) + tuple(part.shape[1:]), dtype=part.dtype, device=part.device)
+        out[start:start + part.shape[0]] = part
+    return out
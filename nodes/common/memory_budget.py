@@ -0,0 +1,375 @@
+"""
+Unified memory budget for A1rSpace caches.
+
+Every cache in the extension (LoRA files, translations, tagger models and
+future checkpoint/VAE caches) is a BudgetedCache registered with a single
+MemoryBudgetManager. The manager enforces one host-RAM and one device-memory
+budget across all caches by evicting the least recently used entry
+globally, and releases device entries when ComfyUI's model management asks
+to free memory.
+
+Budgets are read from the "MemoryBudget" section of config.json
+(host_mb / device_mb, 0 disables the limit).
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+from .config_loader import get_setting
+
+# Lazy import to reduce startup overhead
+_torch = None
+
+
+def _get_torch():
+    """Lazy import torch so the manager can be imported without it."""
+    global _torch
+    if _torch is None:
+        import torch
+        _torch = torch
+    return _torch
+
+
+# ========== Size Estimation ==========
+
+def estimate_size(obj, _seen=None):
+    """
+    Estimate memory held by a cached object.
+
+    Tensors are split by the device they live on; containers and modules
+    are walked recursively. Objects of unknown type fall back to
+    sys.getsizeof, which underestimates but keeps accounting cheap.
+
+    Args:
+        obj: Object to measure
+
+    Returns:
+        tuple: (host_bytes, device_bytes)
+    """
+    torch = _get_torch()
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0, 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, torch.Tensor):
+        nbytes = obj.numel() * obj.element_size()
+        return (nbytes, 0) if obj.device.type == "cpu" else (0, nbytes)
+
+    if isinstance(obj, torch.nn.Module):
+        host = device = 0
+        for t in list(obj.parameters()) + list(obj.buffers()):
+            h, d = estimate_size(t, _seen)
+            host += h
+            device += d
+        return host, device
+
+    if isinstance(obj, dict):
+        items = obj.values()
+    elif isinstance(obj, (list, tuple, set)):
+        items = obj
+    else:
+        nbytes = getattr(obj, "nbytes", None)
+        if isinstance(nbytes, int):
+            return nbytes, 0
+        return sys.getsizeof(obj), 0
+
+    host = device = 0
+    for item in items:
+        h, d = estimate_size(item, _seen)
+        host += h
+        device += d
+    return host, device
+
+
+# ========== Cache ==========
+
+class _Entry:
+    __slots__ = ("value", "host", "device", "tick")
+
+    def __init__(self, value, host, device, tick):
+        self.value = value
+        self.host = host
+        self.device = device
+        self.tick = tick
+
+
+class BudgetedCache:
+    """
+    LRU cache whose entries are accounted against the global budget.
+
+    Supports the small dict-like surface the nodes need: get, put,
+    ``in``, pop and clear. Use get_cache() to obtain a registered instance.
+    """
+
+    def __init__(self, name, manager, max_entries=None):
+        self.name = name
+        self.max_entries = max_entries
+        self._manager = manager
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        with self._manager.lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Return a cached value and mark it as most recently used."""
+        with self._manager.lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            entry.tick = self._manager.next_tick()
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def put(self, key, value, nbytes=None, device_bytes=None):
+        """
+        Store a value and enforce the global budget.
+
+        Args:
+            key: Cache key
+            value: Cached object
+            nbytes (int): Host bytes override, estimated when None
+            device_bytes (int): Device bytes override, estimated when None
+        """
+        if nbytes is None or device_bytes is None:
+            host, device = estimate_size(value)
+            nbytes = host if nbytes is None else nbytes
+            device_bytes = device if device_bytes is None else device_bytes
+
+        with self._manager.lock:
+            self._entries.pop(key, None)
+            self._entries[key] = _Entry(value, nbytes, device_bytes, self._manager.next_tick())
+            if self.max_entries is not None:
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            self._manager.enforce(protect=(self, key))
+        return value
+
+    def pop(self, key, default=None):
+        with self._manager.lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry.value
+
+    def clear(self):
+        with self._manager.lock:
+            self._entries.clear()
+
+    def keys(self):
+        with self._manager.lock:
+            return list(self._entries.keys())
+
+    def _oldest(self, device_only=False):
+        """Return (key, entry) of the least recently used candidate."""
+        for key, entry in self._entries.items():
+            if not device_only or entry.device > 0:
+                return key, entry
+        return None, None
+
+    def _evict(self, key):
+        self._entries.pop(key, None)
+        self.evictions += 1
+
+    def usage(self):
+        """Return per-cache usage statistics."""
+        with self._manager.lock:
+            return {
+                "entries": len(self._entries),
+                "host_bytes": sum(e.host for e in self._entries.values()),
+                "device_bytes": sum(e.device for e in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# ========== Manager ==========
+
+class MemoryBudgetManager:
+    """Owns all registered caches and enforces the global budgets."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.caches = OrderedDict()
+        self._tick = 0
+
+    def next_tick(self):
+        self._tick += 1
+        return self._tick
+
+    @staticmethod
+    def budgets():
+        """Return (host_limit, device_limit) in bytes, 0 meaning unlimited."""
+        host_mb = get_setting("MemoryBudget", "host_mb", 8192)
+        device_mb = get_setting("MemoryBudget", "device_mb", 2048)
+        return int(host_mb or 0) * 1024 * 1024, int(device_mb or 0) * 1024 * 1024
+
+    def register(self, name, max_entries=None):
+        """Create or return the cache registered under name."""
+        with self.lock:
+            cache = self.caches.get(name)
+            if cache is None:
+                cache = BudgetedCache(name, self, max_entries=max_entries)
+                self.caches[name] = cache
+                _install_comfy_hooks()
+            return cache
+
+    def totals(self):
+        host = device = 0
+        for cache in self.caches.values():
+            for entry in cache._entries.values():
+                host += entry.host
+                device += entry.device
+        return host, device
+
+    def _evict_lru(self, device_only=False, protect=None):
+        """Evict the globally least recently used entry, return it or None."""
+        victim = None
+        for cache in self.caches.values():
+            key, entry = cache._oldest(device_only=device_only)
+            if entry is None or (protect is not None and protect == (cache, key)):
+                continue
+            if victim is None or entry.tick < victim[2].tick:
+                victim = (cache, key, entry)
+        if victim is None:
+            return None
+        victim[0]._evict(victim[1])
+        return victim[2]
+
+    def enforce(self, protect=None):
+        """Evict across caches until both budgets are respected."""
+        host_limit, device_limit = self.budgets()
+        with self.lock:
+            host, device = self.totals()
+            freed_device = False
+            while device_limit and device > device_limit:
+                entry = self._evict_lru(device_only=True, protect=protect)
+                if entry is None:
+                    break
+                host -= entry.host
+                device -= entry.device
+                freed_device = True
+            while host_limit and host > host_limit:
+                entry = self._evict_lru(protect=protect)
+                if entry is None:
+                    break
+                host -= entry.host
+                device -= entry.device
+                freed_device = freed_device or entry.device > 0
+        if freed_device:
+            _soft_empty_cache()
+
+    def release_device(self, memory_required=None):
+        """
+        Evict device-resident entries, oldest first.
+
+        Args:
+            memory_required (int): Stop after freeing this many bytes, all when None
+
+        Returns:
+            int: Device bytes released
+        """
+        freed = 0
+        with self.lock:
+            while memory_required is None or freed < memory_required:
+                entry = self._evict_lru(device_only=True)
+                if entry is None:
+                    break
+                freed += entry.device
+        if freed:
+            _soft_empty_cache()
+        return freed
+
+    def report(self):
+        """Return usage per cache plus totals and budgets."""
+        host_limit, device_limit = self.budgets()
+        with self.lock:
+            caches = {name: cache.usage() for name, cache in self.caches.items()}
+            host, device = self.totals()
+        return {
+            "caches": caches,
+            "host_bytes": host,
+            "device_bytes": device,
+            "host_limit": host_limit,
+            "device_limit": device_limit,
+        }
+
+
+_manager = MemoryBudgetManager()
+
+
+def get_cache(name, max_entries=None):
+    """
+    Get the budgeted cache registered under name.
+
+    Example:
+        _lora_cache = get_cache("lora")
+        lora = _lora_cache.get(path) or _lora_cache.put(path, load(path))
+    """
+    return _manager.register(name, max_entries=max_entries)
+
+
+def memory_report():
+    """Return the usage report of all registered caches."""
+    return _manager.report()
+
+
+def get_manager():
+    return _manager
+
+
+# ========== ComfyUI Integration ==========
+
+def _soft_empty_cache():
+    try:
+        import comfy.model_management as mm
+        mm.soft_empty_cache()
+    except Exception:
+        pass
+
+
+def _install_comfy_hooks():
+    """
+    Release A1rSpace device caches whenever ComfyUI frees memory.
+
+    Wraps comfy.model_management.free_memory and unload_all_models once;
+    silently skipped when ComfyUI is not importable.
+    """
+    try:
+        import comfy.model_management as mm
+    except Exception:
+        return
+
+    if hasattr(mm, "_a1r_original_free_memory"):
+        return
+
+    mm._a1r_original_free_memory = mm.free_memory
+    mm._a1r_original_unload_all_models = mm.unload_all_models
+
+    def free_memory(memory_required, device, *args, **kwargs):
+        try:
+            if getattr(device, "type", "cpu") != "cpu" and mm.get_free_memory(device) < memory_required:
+                _manager.release_device(memory_required)
+        except Exception as e:
+            print(f"[A1rSpace] MemoryBudget release failed: {e}")
+        return mm._a1r_original_free_memory(memory_required, device, *args, **kwargs)
+
+    def unload_all_models(*args, **kwargs):
+        try:
+            _manager.release_device()
+        except Exception as e:
+            print(f"[A1rSpace] MemoryBudget release failed: {e}")
+        return mm._a1r_original_unload_all_models(*args, **kwargs)
+
+    mm.free_memory = free_memory
+    mm.unload_all_models = unload_all_models
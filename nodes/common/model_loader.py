@@ -9,6 +9,9 @@ import comfy.sd
 import comfy.utils
 import comfy.controlnet
 
+from . import ckpt_converter, parallel_reader, usage_log
+from .memory_budget import get_cache
+
 
 class ModelLoaderBase:
     """
@@ -17,17 +20,37 @@ class ModelLoaderBase:
     Provides static methods for loading various model types and applying LoRAs
     with caching support for improved performance.
     """
-    _lora_cache = {}
+    _lora_cache = get_cache("lora")
 
     @staticmethod
     def load_checkpoint(ckpt_name):
-        """Load a checkpoint file."""
+        """Load a checkpoint file, using the converted copy for pickle checkpoints."""
         ckpt_path = folder_paths.get_full_path_or_raise("checkpoints", ckpt_name)
+        usage_log.record("checkpoint", ckpt_name)
+        ckpt_path = ckpt_converter.resolve_checkpoint_path(ckpt_path)
+        embedding_directory = folder_paths.get_folder_paths("embeddings")
+
+        settings = parallel_reader.parallel_read_settings()
+        if parallel_reader.should_read_parallel(ckpt_path, settings) and hasattr(comfy.sd, "load_state_dict_guess_config"):
+            sd, metadata = parallel_reader.read_safetensors_parallel(
+                ckpt_path, threads=settings["threads"], chunk_size=settings["chunk_size"]
+            )
+            out = comfy.sd.load_state_dict_guess_config(
+                sd,
+                output_vae=True,
+                output_clip=True,
+                embedding_directory=embedding_directory,
+                metadata=metadata
+            )
+            if out is None:
+                raise RuntimeError(f"Could not detect model type of: {ckpt_path}")
+            return out[0], out[1], out[2]
+
         out = comfy.sd.load_checkpoint_guess_config(
             ckpt_path,
             output_vae=True,
             output_clip=True,
-            embedding_directory=folder_paths.get_folder_paths("embeddings")
+            embedding_directory=embedding_directory
         )
         return out[0], out[1], out[2]
     
@@ -94,11 +117,12 @@ class ModelLoaderBase:
         try:
             lora_path = folder_paths.get_full_path_or_raise("loras", lora_name)
 
-            if lora_path in cls._lora_cache:
-                return cls._lora_cache[lora_path]
+            lora = cls._lora_cache.get(lora_path)
+            if lora is not None:
+                return lora
 
             lora = comfy.utils.load_torch_file(lora_path, safe_load=True)
-            cls._lora_cache[lora_path] = lora
+            cls._lora_cache.put(lora_path, lora)
             return lora
 
         except Exception as e:
@@ -114,6 +138,7 @@ class ModelLoaderBase:
         if model_strength == 0 and clip_strength == 0:
             return (model, clip)
         
+        usage_log.record("lora", lora_name)
         lora = cls.load_lora_file(lora_name)
         if lora is None:
             return (model, clip)
@@ -0,0 +1,148 @@
+"""
+Parallel safetensors reader for ComfyUI A1rSpace extension.
+
+A safetensors file is an 8-byte header length, a JSON header and one flat
+data region. This module reads the data region with several threads into a
+single preallocated buffer and returns tensors that are views over that
+buffer, so the only copy made is the read itself.
+
+Large sequential reads through one thread leave most of the bandwidth of
+NVMe drives and network filesystems unused; splitting the region into
+chunks and issuing them concurrently keeps more requests in flight.
+"""
+import os
+import json
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+from .config_loader import get_setting
+
+# safetensors dtype tags -> torch dtypes
+_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+if hasattr(torch, "float8_e4m3fn"):
+    _DTYPES["F8_E4M3"] = torch.float8_e4m3fn
+if hasattr(torch, "float8_e5m2"):
+    _DTYPES["F8_E5M2"] = torch.float8_e5m2
+
+
+def read_header(path):
+    """
+    Read the JSON header of a safetensors file.
+
+    Args:
+        path (str): Path to the .safetensors file
+
+    Returns:
+        tuple: (header dict without __metadata__, metadata dict or None, data region offset)
+    """
+    with open(path, "rb") as f:
+        raw_len = f.read(8)
+        if len(raw_len) != 8:
+            raise ValueError(f"Not a safetensors file: {path}")
+        header_len = struct.unpack("<Q", raw_len)[0]
+        header = json.loads(f.read(header_len))
+    metadata = header.pop("__metadata__", None)
+    return header, metadata, 8 + header_len
+
+
+def _read_chunk(path, view, file_offset):
+    """Read len(view) bytes starting at file_offset into view."""
+    with open(path, "rb", buffering=0) as f:
+        f.seek(file_offset)
+        done = 0
+        total = len(view)
+        while done < total:
+            n = f.readinto(view[done:])
+            if not n:
+                raise IOError(f"Unexpected end of file while reading {path}")
+            done += n
+
+
+def read_safetensors_parallel(path, threads=8, chunk_size=64 * 1024 * 1024, device="cpu"):
+    """
+    Load a safetensors file using concurrent chunked reads.
+
+    Args:
+        path (str): Path to the .safetensors file
+        threads (int): Number of reader threads
+        chunk_size (int): Bytes per read request
+        device (str): Only "cpu" is read directly; other devices are moved after reading
+
+    Returns:
+        tuple: (state dict of tensor views, metadata dict or None)
+    """
+    header, metadata, data_offset = read_header(path)
+    data_len = os.path.getsize(path) - data_offset
+
+    buffer = torch.empty(data_len, dtype=torch.uint8)
+    view = memoryview(buffer.numpy()).cast("B")
+
+    chunk_size = max(1024 * 1024, int(chunk_size))
+    chunks = [(start, min(start + chunk_size, data_len)) for start in range(0, data_len, chunk_size)]
+
+    if threads <= 1 or len(chunks) <= 1:
+        for start, end in chunks:
+            _read_chunk(path, view[start:end], data_offset + start)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = [pool.submit(_read_chunk, path, view[start:end], data_offset + start)
+                       for start, end in chunks]
+            for future in futures:
+                future.result()
+
+    sd = {}
+    for name, info in header.items():
+        dtype = _DTYPES.get(info["dtype"])
+        if dtype is None:
+            raise ValueError(f"Unsupported safetensors dtype {info['dtype']} for {name}")
+        begin, end = info["data_offsets"]
+        raw = buffer[begin:end]
+        element_size = torch.empty((), dtype=dtype).element_size()
+        if begin % element_size != 0:
+            # Misaligned entries cannot be reinterpreted in place
+            raw = raw.clone()
+        tensor = raw.view(dtype).reshape(info["shape"])
+        if device != "cpu":
+            tensor = tensor.to(device)
+        sd[name] = tensor
+
+    return sd, metadata
+
+
+def parallel_read_settings():
+    """
+    Get parallel read settings from config.json.
+
+    Returns:
+        dict: enabled, threads, chunk_size (bytes) and min_size (bytes)
+    """
+    return {
+        "enabled": bool(get_setting("ParallelRead", "enabled", False)),
+        "threads": int(get_setting("ParallelRead", "threads", 8)),
+        "chunk_size": int(get_setting("ParallelRead", "chunk_mb", 64)) * 1024 * 1024,
+        "min_size": int(get_setting("ParallelRead", "min_size_mb", 1024)) * 1024 * 1024,
+    }
+
+
+def should_read_parallel(path, settings=None):
+    """Return True when a checkpoint should go through the parallel reader."""
+    settings = settings or parallel_read_settings()
+    if not settings["enabled"] or not path.lower().endswith(".safetensors"):
+        return False
+    try:
+        return os.path.getsize(path) >= settings["min_size"]
+    except OSError:
+        return False
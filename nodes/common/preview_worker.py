@@ -0,0 +1,84 @@
+"""
+Background preview encoder for ComfyUI A1rSpace extension.
+
+The sampling callback hands preview jobs (decode, encode, send) to a single
+worker thread instead of running them itself. The hand-off slot holds one
+job: submitting while a job is still waiting replaces it, so the worker
+always encodes the latest frame and the sampler never waits on PIL or
+websocket I/O. Frames the worker could not keep up with are counted as
+dropped.
+"""
+import threading
+
+
+class PreviewWorker:
+    """Single daemon thread running the most recently submitted job."""
+
+    def __init__(self, name="A1rSpace-Preview"):
+        self.name = name
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self._cond = threading.Condition()
+        self._pending = None
+        self._busy = False
+        self._thread = None
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def submit(self, job):
+        """
+        Queue a job, replacing one that has not started yet.
+
+        Args:
+            job: Callable without arguments
+        """
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = job
+            self.submitted += 1
+            self._ensure_thread()
+            self._cond.notify()
+
+    def wait_idle(self, timeout=None):
+        """Block until the pending job (if any) has finished."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout=timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                job = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                job()
+            except Exception as e:
+                print(f"[A1rSpace] Preview job failed: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self.completed += 1
+                    self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {"submitted": self.submitted, "completed": self.completed, "dropped": self.dropped}
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    """Get the shared preview worker."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = PreviewWorker()
+        return _worker
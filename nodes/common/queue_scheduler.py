@@ -0,0 +1,222 @@
+"""
+Checkpoint-affinity scheduling for the ComfyUI prompt queue.
+
+When many users share one worker, queued prompts alternate between
+checkpoints and every prompt pays a model swap. This opt-in hook inspects
+pending prompts for A1r checkpoint loader and LoRA nodes and, when the
+next prompt needs a different model set than the one just executed, pulls
+forward a queued prompt that uses the same set.
+
+Fairness is bounded: a prompt at the head of the queue is never passed
+over more than max_skips times or once it has waited max_delay_seconds.
+Reordering works by giving the chosen prompt a queue number just below the
+current head, so ComfyUI's own heap order and UI stay consistent.
+
+Settings live in the "QueueAffinity" section of config.json.
+"""
+import re
+import time
+import heapq
+import types
+
+from .config_loader import get_setting
+
+CHECKPOINT_LOADERS = {
+    "A1r Checkpoint Loader",
+    "A1r Double CheckpointLoader",
+    "A1r Separate CheckpointLoader",
+}
+
+_LORA_NAME = re.compile(r"^lora_name(?:_(\d+))?$")
+
+
+def _literal(prompt, value, depth=0):
+    """Resolve a widget value, following one link to a picker node."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)) and len(value) == 2 and depth == 0:
+        node = prompt.get(str(value[0]))
+        if isinstance(node, dict):
+            inputs = node.get("inputs", {})
+            for key in ("checkpoint", "ckpt_name", "text"):
+                if key in inputs:
+                    return _literal(prompt, inputs[key], depth + 1)
+    return None
+
+
+def model_signature(prompt):
+    """
+    Get the model set a prompt will load through A1r loader nodes.
+
+    Args:
+        prompt (dict): Prompt in API format ({node_id: {class_type, inputs}})
+
+    Returns:
+        tuple: (frozenset of checkpoint names, frozenset of LoRA names)
+    """
+    ckpts = set()
+    loras = set()
+    for node in prompt.values():
+        if not isinstance(node, dict):
+            continue
+        class_type = node.get("class_type", "")
+        inputs = node.get("inputs", {})
+
+        if class_type in CHECKPOINT_LOADERS:
+            if class_type == "A1r Checkpoint Loader":
+                names = [inputs.get("ckpt_name")]
+            elif class_type == "A1r Double CheckpointLoader":
+                names = [inputs.get("ckpt_name_a")]
+                if inputs.get("enable_second") is True:
+                    names.append(inputs.get("ckpt_name_b"))
+            else:
+                key = "ckpt_name_b" if inputs.get("separate_mode") is True else "ckpt_name_a"
+                names = [inputs.get(key)]
+            for name in names:
+                name = _literal(prompt, name)
+                if name and name != "None":
+                    ckpts.add(name)
+
+        elif class_type.startswith("A1r") and "LoRA" in class_type:
+            for key, value in inputs.items():
+                match = _LORA_NAME.match(key)
+                if not match or not isinstance(value, str) or value == "None":
+                    continue
+                index = match.group(1)
+                enabled = True
+                if index is not None:
+                    enabled = inputs.get(f"enable_lora_{index}", inputs.get(f"enable_{index}", True))
+                if enabled is True:
+                    loras.add(value)
+
+    return frozenset(ckpts), frozenset(loras)
+
+
+class AffinityScheduler:
+    """Picks the next prompt, preferring the model set that is already loaded."""
+
+    def __init__(self, max_delay_seconds=120.0, max_skips=4, lookahead=32):
+        self.max_delay_seconds = max_delay_seconds
+        self.max_skips = max_skips
+        self.lookahead = lookahead
+        self.last_signature = None
+        self._enqueued = {}
+        self._skips = {}
+        self._signatures = {}
+
+    def _signature(self, item):
+        prompt_id = item[1]
+        sig = self._signatures.get(prompt_id)
+        if sig is None:
+            sig = model_signature(item[2])
+            self._signatures[prompt_id] = sig
+        return sig
+
+    def on_put(self, item):
+        self._enqueued.setdefault(item[1], time.time())
+
+    def _prune(self, queue):
+        """Forget prompts that left the queue without on_get (deleted or wiped)."""
+        live = {item[1] for item in queue}
+        for table in (self._enqueued, self._skips, self._signatures):
+            for prompt_id in [p for p in table if p not in live]:
+                del table[prompt_id]
+
+    def reorder(self, queue):
+        """
+        Move the preferred item to the head of the heap in place.
+
+        Args:
+            queue (list): PromptQueue.queue heap, caller holds the mutex
+        """
+        self._prune(queue)
+        if len(queue) < 2 or self.last_signature is None:
+            return
+
+        head = queue[0]
+        head_sig = self._signature(head)
+        if not any(head_sig) or head_sig == self.last_signature:
+            return
+
+        head_id = head[1]
+        waited = time.time() - self._enqueued.get(head_id, time.time())
+        if waited >= self.max_delay_seconds or self._skips.get(head_id, 0) >= self.max_skips:
+            return
+
+        candidates = heapq.nsmallest(self.lookahead, queue)[1:]
+        chosen = None
+        for item in candidates:
+            if self._signature(item) == self.last_signature:
+                chosen = item
+                break
+        if chosen is None:
+            return
+
+        # Every item ahead of the chosen one is passed over once
+        for item in candidates:
+            if item is chosen:
+                break
+            self._skips[item[1]] = self._skips.get(item[1], 0) + 1
+        self._skips[head_id] = self._skips.get(head_id, 0) + 1
+
+        queue.remove(chosen)
+        promoted = (head[0] - 1,) + tuple(chosen[1:])
+        queue.append(promoted)
+        heapq.heapify(queue)
+
+    def on_get(self, item):
+        prompt_id = item[1]
+        sig = self._signature(item)
+        if any(sig):
+            self.last_signature = sig
+        self._enqueued.pop(prompt_id, None)
+        self._skips.pop(prompt_id, None)
+        self._signatures.pop(prompt_id, None)
+
+
+def install(prompt_queue):
+    """
+    Install the affinity scheduler on a PromptQueue instance.
+
+    Wraps the instance's put and get; does nothing unless
+    QueueAffinity.enabled is set in config.json.
+
+    Returns:
+        AffinityScheduler or None
+    """
+    if not get_setting("QueueAffinity", "enabled", False):
+        return None
+    if getattr(prompt_queue, "_a1r_scheduler", None) is not None:
+        return prompt_queue._a1r_scheduler
+
+    scheduler = AffinityScheduler(
+        max_delay_seconds=float(get_setting("QueueAffinity", "max_delay_seconds", 120)),
+        max_skips=int(get_setting("QueueAffinity", "max_skips", 4)),
+        lookahead=int(get_setting("QueueAffinity", "lookahead", 32)),
+    )
+    original_put = prompt_queue.put
+    original_get = prompt_queue.get
+
+    def put(self, item):
+        # Held across the put so reorder() never prunes an item that is not queued yet
+        with self.mutex:
+            scheduler.on_put(item)
+            return original_put(item)
+
+    def get(self, timeout=None):
+        # The mutex is re-entrant and released while get() waits on the queue
+        with self.mutex:
+            try:
+                scheduler.reorder(self.queue)
+            except Exception as e:
+                print(f"[A1rSpace] Queue affinity skipped: {e}")
+            result = original_get(timeout=timeout)
+            if result is not None:
+                scheduler.on_get(result[0])
+            return result
+
+    prompt_queue.put = types.MethodType(put, prompt_queue)
+    prompt_queue.get = types.MethodType(get, prompt_queue)
+    prompt_queue._a1r_scheduler = scheduler
+    print("[A1rSpace] Queue affinity scheduling enabled")
+    return scheduler
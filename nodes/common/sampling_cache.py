@@ -0,0 +1,226 @@
+"""
+Resumable sampling snapshots for ComfyUI A1rSpace extension.
+
+common_ksampler keys a run by everything that determines its trajectory:
+model, patches and model_options, conditioning and input latent
+fingerprints, seed(s), sampler, scheduler, steps, cfg, denoise and the
+start step. last_step is not part of the key, so reruns that only move
+last_step (start_step/last_step-style refinement of the tail) share it.
+
+For single-step deterministic samplers the run is split at the
+SamplingCache.snapshot_at steps. Every segment ends with its leftover
+noise, exactly like a KSamplerAdvanced run with last_step set, and its
+latent is stored as a snapshot; the next segment continues from it without
+adding noise. A later run with the same key resumes from the latest
+snapshot below its last step instead of recomputing it. The split is the
+same whether or not a snapshot exists, so a resumed run returns the same
+latent as one computed from the start. Multistep and ancestral samplers
+carry state between steps that a latent cannot restore, and inpainting
+blends with the original latent every step, so those runs are not split
+and only reuse final results.
+
+Runs whose model options or conditioning hold objects that cannot be
+fingerprinted bypass the cache.
+
+Snapshots and final latents live in a budgeted "sampling_snapshots" cache.
+Settings are read from the "SamplingCache" section of config.json.
+"""
+import hashlib
+import inspect
+import functools
+import weakref
+
+import torch
+
+from .config_loader import get_setting
+from .latent_utils import tensor_fingerprint
+from .memory_budget import get_cache
+
+# Samplers whose next step depends only on the current latent and sigma
+RESUMABLE_SAMPLERS = ("euler", "heun", "heunpp2", "dpm_2", "ddim")
+
+_snapshots = None
+
+
+def is_enabled():
+    """Return True when sampling snapshots are enabled in config.json."""
+    return bool(get_setting("SamplingCache", "enabled", False))
+
+
+def _get_snapshots():
+    global _snapshots
+    if _snapshots is None:
+        _snapshots = get_cache("sampling_snapshots",
+                               max_entries=int(get_setting("SamplingCache", "max_entries", 16)))
+    return _snapshots
+
+
+def snapshot_steps(total_steps):
+    """
+    Get the step indices to snapshot, from SamplingCache.snapshot_at.
+
+    Entries below 1 are fractions of the run, larger values absolute steps.
+    """
+    points = get_setting("SamplingCache", "snapshot_at", [0.5, 0.75])
+    if not isinstance(points, (list, tuple)):
+        points = [points]
+    steps = set()
+    for p in points:
+        try:
+            p = float(p)
+        except (TypeError, ValueError):
+            continue
+        step = int(round(p * total_steps)) if p < 1 else int(p)
+        if 0 < step < total_steps:
+            steps.add(step)
+    return steps
+
+
+def split_points(sampler_name, steps, begin, end, noise_mask=None):
+    """
+    Get the snapshot steps a run from begin to end is split at.
+
+    Returns:
+        list: Ascending steps strictly between begin and end, empty for
+        samplers or inpainting runs that cannot resume from a latent
+    """
+    if sampler_name not in RESUMABLE_SAMPLERS or noise_mask is not None:
+        return []
+    return sorted(step for step in snapshot_steps(steps) if begin < step < end)
+
+
+class Uncacheable(Exception):
+    """Raised when part of a run cannot be fingerprinted; the run bypasses the cache."""
+
+
+# Nesting limit for walking conditioning and model_options
+_MAX_DEPTH = 12
+
+
+def _callable_fingerprint(fn, depth):
+    """Fingerprint a patch function by its code, defaults and closure values."""
+    if isinstance(fn, functools.partial):
+        return ("partial", _value_fingerprint(fn.func, depth), _value_fingerprint(fn.args, depth),
+                _value_fingerprint(fn.keywords, depth))
+    if inspect.ismethod(fn):
+        return ("method", _value_fingerprint(fn.__func__, depth), _value_fingerprint(fn.__self__, depth))
+    code = getattr(fn, "__code__", None)
+    if code is None:
+        # Builtins carry no per-instance state worth keying on
+        if inspect.isbuiltin(fn):
+            return ("builtin", getattr(fn, "__module__", None), fn.__qualname__)
+        raise Uncacheable(f"cannot fingerprint {type(fn).__name__}")
+    try:
+        cells = tuple(c.cell_contents for c in (fn.__closure__ or ()))
+    except ValueError:
+        raise Uncacheable(f"{fn.__qualname__} has an unbound closure variable")
+    return (
+        "function", fn.__module__, fn.__qualname__, code.co_filename, code.co_firstlineno,
+        hashlib.blake2b(code.co_code, digest_size=8).hexdigest(),
+        _value_fingerprint(fn.__defaults__, depth),
+        _value_fingerprint(fn.__kwdefaults__, depth),
+        _value_fingerprint(cells, depth),
+    )
+
+
+def _value_fingerprint(value, depth=0):
+    """
+    Fingerprint a conditioning or model_options value.
+
+    Tensors are keyed by content and functions by code plus closure values.
+    Other objects (ControlNets, patch classes, modules) are only accepted
+    when they provide cache_signature(); anything else raises Uncacheable,
+    because identity-based keys can be reused after garbage collection.
+    """
+    if depth > _MAX_DEPTH:
+        raise Uncacheable("value nested too deeply")
+    depth += 1
+    if hasattr(value, "shape") and hasattr(value, "dtype"):
+        return tensor_fingerprint(value)
+    if isinstance(value, (str, int, float, bool, bytes, torch.device, torch.dtype)) or value is None:
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_value_fingerprint(v, depth) for v in value) + "]"
+    if isinstance(value, (set, frozenset)):
+        return "{" + ",".join(sorted(_value_fingerprint(v, depth) for v in value)) + "}"
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{k}:{_value_fingerprint(v, depth)}" for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))) + "}"
+    cache_signature = getattr(value, "cache_signature", None)
+    if callable(cache_signature) and not isinstance(value, type):
+        return f"<{type(value).__qualname__}:{_value_fingerprint(cache_signature(), depth)}>"
+    if callable(value) and not isinstance(value, type):
+        return repr(_callable_fingerprint(value, depth))
+    raise Uncacheable(f"cannot fingerprint {type(value).__name__}")
+
+
+def model_signature(model):
+    """
+    Identify a ModelPatcher by its base model, applied patches and model_options.
+
+    model_options covers transformer_options patches (FreeU, PAG, attention
+    patches), sampler_cfg_function, the post-cfg functions and the unet
+    wrapper. Raises Uncacheable when one of them cannot be fingerprinted.
+    """
+    patches = getattr(model, "patches", {}) or {}
+    options = getattr(model, "model_options", None) or {}
+    return (id(model.model), str(getattr(model, "patches_uuid", "")), len(patches), _value_fingerprint(options))
+
+
+def run_key(model, positive, negative, latent_image, latent, seed, seeds, sampler_name, scheduler,
+            steps, cfg, denoise, start_step=None):
+    """
+    Build the key shared by every snapshot of one sampling trajectory.
+
+    Raises:
+        Uncacheable: When the model options or conditioning hold objects
+        that cannot be fingerprinted
+    """
+    return (
+        model_signature(model),
+        _value_fingerprint(positive),
+        _value_fingerprint(negative),
+        tensor_fingerprint(latent_image),
+        _value_fingerprint(latent.get("noise_mask")),
+        _value_fingerprint(latent.get("batch_index")),
+        tuple(seeds) if seeds else seed,
+        sampler_name, scheduler, steps, float(cfg), float(denoise), int(start_step or 0),
+    )
+
+
+def lookup(model, key, step, full_denoise):
+    """
+    Return a copy of the latent stored for a trajectory at a step, or None.
+
+    Args:
+        model: ModelPatcher of the run
+        key: Key from run_key()
+        step (int): Step the latent was taken at
+        full_denoise (bool): False for a snapshot with leftover noise
+
+    Returns:
+        torch.Tensor: Latent the caller may modify, or None
+    """
+    entry = _get_snapshots().get((key, step, bool(full_denoise)))
+    if entry is None:
+        return None
+    model_ref, samples = entry
+    return samples.clone() if model_ref() is model.model else None
+
+
+def resume_point(model, key, points):
+    """
+    Find the latest stored snapshot among the split points of a run.
+
+    Returns:
+        tuple: (step, latent) or (None, None)
+    """
+    for step in reversed(points):
+        latent = lookup(model, key, step, False)
+        if latent is not None:
+            return step, latent
+    return None, None
+
+
+def store(model, key, step, full_denoise, samples):
+    """Store a copy of the latent of a trajectory at a step."""
+    _get_snapshots().put((key, step, bool(full_denoise)), (weakref.ref(model.model), samples.clone()))
@@ -0,0 +1,155 @@
+"""
+Sampling time instrumentation for ComfyUI A1rSpace extension.
+
+When enabled, common_ksampler records wall time for setup (noise and
+latent preparation), every sampling step and the preview callback. Each
+run is printed as one structured log line, kept in a rolling history for
+the /a1rspace/stats route and handed to the node as UI data.
+
+Disabled by default; when off, sampling pays a single settings lookup.
+Settings live in the "SamplingStats" section of config.json.
+"""
+import json
+import time
+import threading
+from collections import deque
+
+from .config_loader import get_setting
+
+_lock = threading.Lock()
+_history = None
+_local = threading.local()
+
+
+def is_enabled():
+    """Return True when sampling timing is enabled in config.json."""
+    return bool(get_setting("SamplingStats", "enabled", False))
+
+
+def _get_history():
+    global _history
+    if _history is None:
+        _history = deque(maxlen=max(1, int(get_setting("SamplingStats", "history", 50))))
+    return _history
+
+
+class SamplingTimer:
+    """
+    Wall-clock timer for one sampling run.
+
+    Step time is the interval between consecutive sampler callbacks minus
+    the time spent inside the preview callback itself, so it covers the
+    model forward pass and sampler math.
+    """
+
+    def __init__(self, steps, batch_size):
+        self.steps = steps
+        self.batch_size = batch_size
+        self.started = time.perf_counter()
+        self.setup_time = 0.0
+        self.step_times = []
+        self.callback_time = 0.0
+        self._last = None
+
+    def setup_done(self):
+        now = time.perf_counter()
+        self.setup_time = now - self.started
+        self._last = now
+
+    def wrap_callback(self, callback):
+        """Wrap a sampler callback to time steps and the callback itself."""
+        def timed_callback(step, x0, x, total_steps):
+            now = time.perf_counter()
+            self.step_times.append(now - self._last)
+            if callback is not None:
+                callback(step, x0, x, total_steps)
+            done = time.perf_counter()
+            self.callback_time += done - now
+            self._last = done
+        return timed_callback
+
+    def finish(self, label="sampling"):
+        """
+        Close the run, log it and add it to the rolling history.
+
+        Returns:
+            dict: Timing record of this run
+        """
+        total = time.perf_counter() - self.started
+        step_total = sum(self.step_times)
+        record = {
+            "label": label,
+            "time": int(time.time()),
+            "steps": self.steps,
+            "batch_size": self.batch_size,
+            "setup_s": round(self.setup_time, 4),
+            "step_s": [round(t, 4) for t in self.step_times],
+            "step_mean_s": round(step_total / len(self.step_times), 4) if self.step_times else 0.0,
+            "callback_s": round(self.callback_time, 4),
+            "total_s": round(total, 4),
+        }
+        with _lock:
+            _get_history().append(record)
+        pending = getattr(_local, "pending", None)
+        if pending is not None:
+            pending.append(record)
+
+        log_record = {k: v for k, v in record.items() if k != "step_s"}
+        print(f"[A1rSpace] sampling_stats {json.dumps(log_record, separators=(',', ':'))}")
+        return record
+
+
+def start_run(steps, batch_size):
+    """Start timing a run, or return None when timing is disabled."""
+    if not is_enabled():
+        return None
+    return SamplingTimer(steps, batch_size)
+
+
+def begin_node():
+    """Start collecting the runs of the current node execution."""
+    _local.pending = []
+
+
+def end_node():
+    """Return the runs recorded since begin_node() and stop collecting."""
+    pending = getattr(_local, "pending", None) or []
+    _local.pending = None
+    return pending
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summary():
+    """
+    Summarize the rolling history.
+
+    Returns:
+        dict: Run count, mean setup/callback/total time, step percentiles
+              and the most recent runs
+    """
+    with _lock:
+        runs = list(_get_history())
+    steps = [t for run in runs for t in run["step_s"]]
+    count = len(runs)
+
+    def mean(key):
+        return round(sum(run[key] for run in runs) / count, 4) if count else 0.0
+
+    return {
+        "enabled": is_enabled(),
+        "runs": count,
+        "setup_mean_s": mean("setup_s"),
+        "callback_mean_s": mean("callback_s"),
+        "total_mean_s": mean("total_s"),
+        "step_mean_s": round(sum(steps) / len(steps), 4) if steps else 0.0,
+        "step_p50_s": _percentile(steps, 0.5),
+        "step_p95_s": _percentile(steps, 0.95),
+        "recent": runs[-5:],
+    }
@@ -0,0 +1,209 @@
+"""
+Model usage log and startup warm-up for ComfyUI A1rSpace extension.
+
+Loaders record every checkpoint and LoRA they load in a compact JSON log
+(name, hit count, last use). On startup an optional background warm-up
+reads the most frequently used files back in, within a memory budget, so
+the first prompts after a restart do not pay the full cold-load cost.
+
+LoRAs are loaded into the budgeted LoRA cache. Checkpoints have no
+in-process cache (ComfyUI caches node outputs itself), so they are warmed
+into the OS page cache by streaming the file once.
+"""
+import os
+import json
+import time
+import atexit
+import threading
+
+from .config_loader import get_setting
+
+# Minimum seconds between log writes, pending changes are flushed at exit
+FLUSH_INTERVAL = 30.0
+
+_lock = threading.Lock()
+_entries = None
+_dirty = False
+_last_flush = 0.0
+_warmup_thread = None
+
+
+def log_path():
+    """Get the usage log location inside the plugin cache folder."""
+    plugin_base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    return os.path.join(plugin_base_path, "cache", "usage_log.json")
+
+
+def _load():
+    """Load the log from disk once, caller holds the lock."""
+    global _entries
+    if _entries is not None:
+        return _entries
+    _entries = {}
+    try:
+        with open(log_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            _entries = data
+    except (OSError, ValueError):
+        pass
+    return _entries
+
+
+def flush():
+    """Write pending changes to disk."""
+    global _dirty, _last_flush
+    with _lock:
+        if not _dirty:
+            return
+        data = dict(_load())
+        _dirty = False
+        _last_flush = time.time()
+    try:
+        path = log_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[A1rSpace] Failed to write usage log: {e}")
+
+
+atexit.register(flush)
+
+
+def record(kind, name):
+    """
+    Record one use of a model file.
+
+    Args:
+        kind (str): "checkpoint" or "lora"
+        name (str): Name as listed by ModelList
+    """
+    global _dirty
+    if not name or name == "None":
+        return
+    with _lock:
+        entries = _load()
+        key = f"{kind}:{name}"
+        entry = entries.get(key)
+        if entry is None:
+            entry = {"kind": kind, "name": name, "hits": 0, "last_used": 0}
+            entries[key] = entry
+        entry["hits"] += 1
+        entry["last_used"] = int(time.time())
+        _dirty = True
+        due = time.time() - _last_flush >= FLUSH_INTERVAL
+    if due:
+        flush()
+
+
+def top_entries(limit, kind=None):
+    """
+    Get the most frequently used entries, most recent first on ties.
+
+    Args:
+        limit (int): Maximum number of entries
+        kind (str): Optional filter ("checkpoint" or "lora")
+
+    Returns:
+        list: Entry dicts with kind, name, hits and last_used
+    """
+    with _lock:
+        entries = [dict(e) for e in _load().values() if kind is None or e.get("kind") == kind]
+    entries.sort(key=lambda e: (e.get("hits", 0), e.get("last_used", 0)), reverse=True)
+    return entries[:limit]
+
+
+# ========== Warm-up ==========
+
+def _warm_page_cache(path, chunk_size=16 * 1024 * 1024):
+    """Stream a file once so the OS keeps it in the page cache."""
+    buffer = bytearray(chunk_size)
+    with open(path, "rb", buffering=0) as f:
+        while f.readinto(buffer):
+            pass
+
+
+def _resolve_checkpoint(folder_paths, name):
+    """Resolve a checkpoint name to the file a load would actually read."""
+    from . import ckpt_converter
+
+    ckpt_path = folder_paths.get_full_path("checkpoints", name)
+    if ckpt_path and ckpt_converter.is_pickle_checkpoint(ckpt_path) and ckpt_converter.is_enabled():
+        cached = ckpt_converter.cached_path_for(ckpt_path)
+        if os.path.exists(cached):
+            return cached
+    return ckpt_path
+
+
+def warm_up(top_n=None, budget_mb=None):
+    """
+    Preload the most used checkpoints and LoRAs within a byte budget.
+
+    Args:
+        top_n (int): Number of log entries to consider
+        budget_mb (int): Total megabytes to read
+
+    Returns:
+        list: Names that were warmed
+    """
+    import folder_paths
+    from .model_loader import ModelLoaderBase
+
+    if top_n is None:
+        top_n = int(get_setting("WarmUp", "top_n", 5))
+    if budget_mb is None:
+        budget_mb = int(get_setting("WarmUp", "budget_mb", 4096))
+    budget = budget_mb * 1024 * 1024
+
+    warmed = []
+    used = 0
+    for entry in top_entries(top_n):
+        kind, name = entry.get("kind"), entry.get("name")
+        try:
+            if kind == "checkpoint":
+                path = _resolve_checkpoint(folder_paths, name)
+            elif kind == "lora":
+                path = folder_paths.get_full_path("loras", name)
+            else:
+                continue
+            if not path or not os.path.exists(path):
+                continue
+
+            size = os.path.getsize(path)
+            if used + size > budget:
+                continue
+
+            if kind == "lora":
+                ModelLoaderBase.load_lora_file(name)
+            else:
+                _warm_page_cache(path)
+            used += size
+            warmed.append(name)
+        except Exception as e:
+            print(f"[A1rSpace] Warm-up skipped {name}: {e}")
+
+    if warmed:
+        print(f"[A1rSpace] Warm-up loaded {len(warmed)} files ({used / (1024 * 1024):.0f} MB)")
+    return warmed
+
+
+def start_warmup():
+    """Start warm-up in a background thread when enabled in config.json."""
+    global _warmup_thread
+    if not get_setting("WarmUp", "enabled", False):
+        return None
+    if _warmup_thread is not None and _warmup_thread.is_alive():
+        return _warmup_thread
+
+    def run():
+        try:
+            warm_up()
+        except Exception as e:
+            print(f"[A1rSpace] Warm-up failed: {e}")
+
+    _warmup_thread = threading.Thread(target=run, name="A1rSpace-WarmUp", daemon=True)
+    _warmup_thread.start()
+    return _warmup_thread
@@ -0,0 +1,293 @@
+"""
+Image decoding helpers for the A1rSpace LoadImage node.
+
+Decoded frames are cached per file identity in the memory budget and the
+crop preview is drawn on a small cached base image. Once that base is
+cached, new crops of images too large for the frame cache decode only the
+crop rectangle (uncompressed BMP/TIFF and other raw or multi-tile layouts). Kept free of ComfyUI
+imports so the decode paths can be checked on their own.
+"""
+import numpy as np
+from PIL import Image, ImageSequence, ImageOps
+
+from ..common.config_loader import get_setting
+from ..common.file_hash import file_identity
+from ..common.memory_budget import get_cache
+
+# ========== Decoded Image Cache ==========
+
+_decoded_cache = get_cache("decoded_images", max_entries=8)
+_preview_cache = get_cache("load_image_previews", max_entries=16)
+
+# Frame modes whose pixel arrays can be turned back into an image for the preview
+_PREVIEW_MODES = ("RGB", "RGBA", "L", "LA")
+
+# EXIF orientation -> transpose applied by ImageOps.exif_transpose
+_EXIF_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+def _orientation(img):
+    try:
+        return int(img.getexif().get(0x0112, 1))
+    except Exception:
+        return 1
+
+
+def _source_size(img):
+    """
+    Size of the stored (unoriented) raster.
+
+    Taken from the decoder tiles, because TIFF already reports the oriented
+    size before loading in recent Pillow versions.
+    """
+    if not img.tile:
+        return img.size
+    return max(t[1][2] for t in img.tile), max(t[1][3] for t in img.tile)
+
+
+def _frame_array(frame):
+    """Convert an oriented frame to (read-only pixels, alpha band index or None, mode)."""
+    if frame.mode == 'I':
+        frame = frame.point(lambda i: i * (1 / 255))
+    bands = frame.getbands()
+    pixels = np.array(frame)
+    pixels.setflags(write=False)
+    return pixels, bands.index('A') if 'A' in bands else None, frame.mode
+
+
+def _decode_frames(image_path):
+    """
+    Decode every frame of an image file, EXIF-oriented, as numpy arrays.
+
+    Returns:
+        tuple: ((pixels, alpha_index, mode), ...), alpha_index None for frames without alpha
+    """
+    with Image.open(image_path) as img:
+        return tuple(_frame_array(ImageOps.exif_transpose(frame)) for frame in ImageSequence.Iterator(img))
+
+
+def cache_limit():
+    """Largest decoded size in bytes kept in the decoded-frame cache."""
+    return float(get_setting("LoadImage", "cache_max_mb", 512)) * 1024 * 1024
+
+
+def cached_frames(identity):
+    """Return the cached frames of a file identity, or None."""
+    return _decoded_cache.get(identity)
+
+
+def load_frames(image_path, identity=None):
+    """
+    Get the decoded frames of an image, from the cache while the file is unchanged.
+
+    Frames larger than LoadImage.cache_max_mb are decoded but not cached.
+    """
+    identity = identity or file_identity(image_path)
+    frames = _decoded_cache.get(identity)
+    if frames is None:
+        frames = _decode_frames(image_path)
+        nbytes = sum(frame[0].nbytes for frame in frames)
+        if nbytes <= cache_limit():
+            _decoded_cache.put(identity, frames, nbytes=nbytes, device_bytes=0)
+    return frames
+
+
+def probe_image(image_path):
+    """
+    Read the header of an image without decoding pixels.
+
+    Returns:
+        tuple: (oriented width, oriented height, estimated decoded bytes of all frames)
+    """
+    with Image.open(image_path) as img:
+        width, height = _source_size(img)
+        if _orientation(img) in (5, 6, 7, 8):
+            width, height = height, width
+        bytes_per_pixel = len(img.getbands()) * (4 if img.mode in ('I', 'F') else 1)
+        return width, height, width * height * bytes_per_pixel * getattr(img, "n_frames", 1)
+
+
+# ========== Region Decoding ==========
+
+def _source_box(box, orientation, size):
+    """Map a crop box in EXIF-oriented coordinates to source pixel coordinates."""
+    x0, y0, x1, y1 = box
+    w, h = size
+    return {
+        2: (w - x1, y0, w - x0, y1),
+        3: (w - x1, h - y1, w - x0, h - y0),
+        4: (x0, h - y1, x1, h - y0),
+        5: (y0, x0, y1, x1),
+        6: (y0, h - x1, y1, h - x0),
+        7: (w - y1, h - x1, w - y0, h - x0),
+        8: (w - y1, x0, w - y0, x1),
+    }.get(orientation, box)
+
+
+def _oriented_box(box, orientation, size):
+    """Inverse of _source_box: map a source box to EXIF-oriented coordinates."""
+    x0, y0, x1, y1 = box
+    w, h = size
+    return {
+        2: (w - x1, y0, w - x0, y1),
+        3: (w - x1, h - y1, w - x0, h - y0),
+        4: (x0, h - y1, x1, h - y0),
+        5: (y0, x0, y1, x1),
+        6: (h - y1, x0, h - y0, x1),
+        7: (h - y1, w - x1, h - y0, w - x0),
+        8: (y0, w - x1, y1, w - x0),
+    }.get(orientation, box)
+
+
+# Bits per pixel of raw modes, for raw tiles that leave the stride to the decoder
+_RAW_BITS = {
+    "1": 1, "L": 8, "P": 8, "LA": 16, "RGB": 24, "BGR;24": 24, "YCbCr": 24,
+    "RGBA": 32, "RGBX": 32, "BGRA;32": 32, "CMYK": 32,
+    "I;16": 16, "I;16B": 16, "I;16L": 16, "I": 32, "F": 32,
+}
+
+
+def _raw_stride(tile):
+    """Bytes per row of a raw tile, or None when it cannot be narrowed to rows."""
+    args = tile[3]
+    if tile[0] != "raw" or not isinstance(args, tuple) or len(args) != 3 or args[2] not in (1, -1):
+        return None
+    if args[1] > 0:
+        return args[1]
+    bits = _RAW_BITS.get(args[0])
+    if bits is None or args[1] != 0:
+        return None
+    return ((tile[1][2] - tile[1][0]) * bits + 7) // 8
+
+
+def _make_tile(tile, extents, offset):
+    if hasattr(tile, "_replace"):
+        return tile._replace(extents=extents, offset=offset)
+    return (tile[0], extents, offset) + tuple(tile[3:])
+
+
+def _region_tiles(tiles, box, size):
+    """
+    Select the decoder tiles covering box.
+
+    Raw tiles with a known stride are narrowed to the rows inside box,
+    so uncompressed BMP/TIFF read only those rows, and formats split into
+    several tiles skip the ones outside box. Single-tile compressed formats
+    (JPEG, PNG, libtiff) have nothing to skip.
+
+    Returns:
+        tuple: (tiles shifted to the region origin, region bbox), or None when
+        the region would cover most of the image anyway
+    """
+    x0, y0, x1, y1 = box
+    kept = []
+    for tile in tiles:
+        codec, (tx0, ty0, tx1, ty1), offset, args = tile[0], tile[1], tile[2], tile[3]
+        if tx1 <= x0 or tx0 >= x1 or ty1 <= y0 or ty0 >= y1:
+            continue
+        stride = _raw_stride(tile)
+        if stride is not None:
+            ry0, ry1 = max(ty0, y0), min(ty1, y1)
+            # Bottom-up rasters store the last row first
+            offset += (ry0 - ty0 if args[2] == 1 else ty1 - ry1) * stride
+            ty0, ty1 = ry0, ry1
+        kept.append((tile, (tx0, ty0, tx1, ty1), offset))
+    if not kept:
+        return None
+
+    rx0 = min(e[0] for _, e, _ in kept)
+    ry0 = min(e[1] for _, e, _ in kept)
+    rx1 = max(e[2] for _, e, _ in kept)
+    ry1 = max(e[3] for _, e, _ in kept)
+    if (rx1 - rx0) * (ry1 - ry0) * 2 > size[0] * size[1]:
+        return None
+    shifted = [_make_tile(t, (e[0] - rx0, e[1] - ry0, e[2] - rx0, e[3] - ry0), off) for t, e, off in kept]
+    return shifted, (rx0, ry0, rx1, ry1)
+
+
+def decode_region(image_path, box):
+    """
+    Decode only the part of a single-frame image covering an oriented crop box.
+
+    Args:
+        image_path (str): Image file
+        box (tuple): (x0, y0, x1, y1) in EXIF-oriented coordinates
+
+    Returns:
+        tuple: (pixels, alpha_index, mode) of the oriented crop, or None when the
+        format has to be decoded in full
+    """
+    with Image.open(image_path) as img:
+        if getattr(img, "n_frames", 1) != 1 or not img.tile:
+            return None
+        orientation = _orientation(img)
+        size = _source_size(img)
+        src = _source_box(box, orientation, size)
+        region = _region_tiles(img.tile, src, size)
+        if region is None:
+            return None
+        tiles, (rx0, ry0, rx1, ry1) = region
+        img._size = (rx1 - rx0, ry1 - ry0)
+        if hasattr(img, "_tile_size"):
+            img._tile_size = img._size
+        img.tile = tiles
+        img.load()
+        local = (src[0] - rx0, src[1] - ry0, src[2] - rx0, src[3] - ry0)
+        if orientation != 1 and _orientation(img) == 1:
+            # The plugin already applied the orientation while loading (TIFF
+            # does in load_end), so the region is oriented: crop it there
+            frame = img.crop(_oriented_box(local, orientation, (rx1 - rx0, ry1 - ry0)))
+            orientation = 1
+        else:
+            frame = img.crop(local)
+    method = _EXIF_TRANSPOSE.get(orientation)
+    if method is not None:
+        frame = frame.transpose(method)
+    return _frame_array(frame)
+
+
+def has_preview_base(identity, max_edge):
+    """Return True when the crop preview base of a file is cached."""
+    return (identity, max_edge) in _preview_cache
+
+
+def preview_base(image_path, identity, max_edge, frame=None):
+    """
+    Get the oriented RGBA image the crop overlay is drawn on, at most max_edge pixels.
+
+    Built from an already decoded full frame when one is given, so the
+    preview does not decode the file a second time. Otherwise JPEG sources
+    are decoded with draft() at the smallest DCT scale that still covers
+    the preview size. Bases are cached per file identity.
+    """
+    key = (identity, max_edge)
+    base = _preview_cache.get(key)
+    if base is not None:
+        return base
+    if frame is not None and frame[2] in _PREVIEW_MODES:
+        base = Image.fromarray(frame[0])
+        if max_edge:
+            base.thumbnail((max_edge, max_edge))
+        base = base.convert("RGBA")
+    else:
+        with Image.open(image_path) as img:
+            if max_edge and img.format == "JPEG":
+                factor = max_edge / max(img.size)
+                if factor < 1:
+                    img.draft(img.mode, (max(1, int(img.width * factor)), max(1, int(img.height * factor))))
+            base = ImageOps.exif_transpose(img)
+            if base.mode == 'I':
+                base = base.point(lambda i: i * (1 / 255))
+            base = base.convert("RGBA")
+        if max_edge:
+            base.thumbnail((max_edge, max_edge))
+    _preview_cache.put(key, base, nbytes=base.width * base.height * 4, device_bytes=0)
+    return base
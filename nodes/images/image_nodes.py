@@ -6,7 +6,6 @@ and advanced saving with auto-naming capabilities.
 """
 import os
 import random
-import hashlib
 import time
 import uuid
 import json
@@ -14,11 +13,56 @@ import numpy as np
 import torch
 import folder_paths
 import shutil
-from PIL import Image, ImageSequence, ImageOps, ImageDraw
+from PIL import Image, ImageDraw
 from PIL.PngImagePlugin import PngInfo
 from aiohttp import web
 
+from ..common import get_setting
+from ..common.file_hash import file_digest, file_identity
 from ..text.text_advanced import TextSaveFileName
+from .image_decode import (
+    cache_limit, cached_frames, decode_region, has_preview_base, load_frames, preview_base, probe_image
+)
+
+# ========== Frame Conversion ==========
+
+def frames_to_tensors(frames, crop_box=None):
+    """
+    Convert decoded frames to IMAGE and MASK tensors.
+
+    Both outputs are allocated once at their final shape and each frame is
+    converted straight into its slot. Frames without alpha keep a zero mask.
+
+    Args:
+        frames (tuple): Frames from load_frames() or decode_region()
+        crop_box (tuple): (x0, y0, x1, y1) to slice from every frame, or None
+
+    Returns:
+        tuple: (image [N, H, W, C], mask [N, H, W])
+    """
+    if crop_box:
+        x0, y0, x1, y1 = crop_box
+        frames = [(pixels[y0:y1, x0:x1], alpha_index, mode) for pixels, alpha_index, mode in frames]
+    first = frames[0][0]
+    height, width = first.shape[:2]
+    channels = 3 if first.ndim == 2 else first.shape[2]
+
+    output_image = torch.empty((len(frames), height, width, channels), dtype=torch.float32)
+    image_np = output_image.numpy()
+    for i, (pixels, _, _) in enumerate(frames):
+        if pixels.ndim == 2:
+            pixels = pixels[..., None]
+        np.divide(pixels, 255.0, out=image_np[i], dtype=np.float32, casting="unsafe")
+
+    # A real tensor even without alpha: downstream nodes may write the mask in place
+    output_mask = torch.zeros((len(frames), height, width), dtype=torch.float32)
+    mask_np = output_mask.numpy()
+    for i, (pixels, alpha_index, _) in enumerate(frames):
+        if alpha_index is not None:
+            np.divide(pixels[..., alpha_index], 255.0, out=mask_np[i], dtype=np.float32, casting="unsafe")
+            np.subtract(1.0, mask_np[i], out=mask_np[i], dtype=np.float32)
+    return output_image, output_mask
+
 
 # ========== Image Loader with Crop ==========
 
@@ -48,10 +92,14 @@ class LoadImage:
 
     def load_image(self, image, crop_data=""):
         image_path = folder_paths.get_annotated_filepath(image)
+        identity = file_identity(image_path)
         
-        img = Image.open(image_path)
-        original_width = img.width
-        original_height = img.height
+        frames = cached_frames(identity)
+        if frames is not None:
+            original_height, original_width = frames[0][0].shape[:2]
+            decoded_bytes = 0
+        else:
+            original_width, original_height, decoded_bytes = probe_image(image_path)
         
         # Parse crop data
         crop_info = None
@@ -60,45 +108,65 @@ class LoadImage:
                 crop_info = json.loads(crop_data)
                 x = int(crop_info.get("x", 0))
                 y = int(crop_info.get("y", 0))
-                width = int(crop_info.get("width", img.width))
-                height = int(crop_info.get("height", img.height))
+                width = int(crop_info.get("width", original_width))
+                height = int(crop_info.get("height", original_height))
                 
                 # Ensure crop is within bounds
-                x = max(0, min(x, img.width - 1))
-                y = max(0, min(y, img.height - 1))
-                width = max(1, min(width, img.width - x))
-                height = max(1, min(height, img.height - y))
+                x = max(0, min(x, original_width - 1))
+                y = max(0, min(y, original_height - 1))
+                width = max(1, min(width, original_width - x))
+                height = max(1, min(height, original_height - y))
                 
                 crop_info = {"x": x, "y": y, "width": width, "height": height}
             except Exception as e:
                 print(f"[LoadImage] Failed to parse crop_data: {e}")
                 crop_info = None
         
+        # Images too large for the decoded cache decode only the crop when the format allows it.
+        # The crop preview needs the whole image, so this only pays off once its base is cached;
+        # the first run decodes in full and builds the base from that decode.
+        crop_box = None
+        preview_max_edge = int(get_setting("LoadImage", "preview_max_edge", 1024))
+        if crop_info:
+            crop_box = (crop_info['x'], crop_info['y'],
+                        crop_info['x'] + crop_info['width'], crop_info['y'] + crop_info['height'])
+        if (frames is None and crop_box and decoded_bytes > cache_limit()
+                and has_preview_base(identity, preview_max_edge)):
+            try:
+                region = decode_region(image_path, crop_box)
+            except Exception as e:
+                print(f"[LoadImage] Region decode failed, decoding full image: {e}")
+                region = None
+            if region is not None:
+                frames, crop_box = (region,), None
+        if frames is None:
+            frames = load_frames(image_path, identity)
+        full_frame = frames[0] if crop_box else None
+        
         # Generate preview image with crop overlay if crop exists
         preview_results = []
         if crop_info:
-            preview_img = Image.open(image_path)
-            preview_img = ImageOps.exif_transpose(preview_img)
-            if preview_img.mode == 'I':
-                preview_img = preview_img.point(lambda i: i * (1 / 255))
-            preview_img = preview_img.convert("RGBA")
+            preview_img = preview_base(image_path, identity, preview_max_edge, frame=full_frame)
+            scale = preview_img.width / original_width
             
             # Create overlay
             overlay = Image.new('RGBA', preview_img.size, (0, 0, 0, 0))
             draw = ImageDraw.Draw(overlay)
             
-            x, y = crop_info['x'], crop_info['y']
-            crop_width, crop_height = crop_info['width'], crop_info['height']
+            x, y = round(crop_info['x'] * scale), round(crop_info['y'] * scale)
+            crop_width = max(1, round(crop_info['width'] * scale))
+            crop_height = max(1, round(crop_info['height'] * scale))
+            preview_width, preview_height = preview_img.size
             
             # Draw semi-transparent mask outside crop area
             if y > 0:
-                draw.rectangle([0, 0, original_width, y], fill=(64, 64, 64, 180))
-            if y + crop_height < original_height:
-                draw.rectangle([0, y + crop_height, original_width, original_height], fill=(64, 64, 64, 180))
+                draw.rectangle([0, 0, preview_width, y], fill=(64, 64, 64, 180))
+            if y + crop_height < preview_height:
+                draw.rectangle([0, y + crop_height, preview_width, preview_height], fill=(64, 64, 64, 180))
             if x > 0:
                 draw.rectangle([0, y, x, y + crop_height], fill=(64, 64, 64, 180))
-            if x + crop_width < original_width:
-                draw.rectangle([x + crop_width, y, original_width, y + crop_height], fill=(64, 64, 64, 180))
+            if x + crop_width < preview_width:
+                draw.rectangle([x + crop_width, y, preview_width, y + crop_height], fill=(64, 64, 64, 180))
             
             # Draw crop border
             draw.rectangle([x, y, x + crop_width - 1, y + crop_height - 1], outline=(255, 255, 255, 255), width=2)
@@ -112,41 +180,7 @@ class LoadImage:
             
             preview_results.append({"filename": filename, "subfolder": "", "type": "temp"})
         
-        # Apply crop
-        if crop_info:
-            img = img.crop((crop_info['x'], crop_info['y'], 
-                            crop_info['x'] + crop_info['width'], 
-                            crop_info['y'] + crop_info['height']))
-        
-        # Convert to tensor
-        output_images = []
-        output_masks = []
-        
-        for i in ImageSequence.Iterator(img):
-            i = ImageOps.exif_transpose(i)
-            if i.mode == 'I':
-                i = i.point(lambda i: i * (1 / 255))
-            image_np = np.array(i).astype(np.float32) / 255.0
-            
-            if len(image_np.shape) == 2:
-                image_np = np.stack([image_np] * 3, axis=-1)
-            
-            output_images.append(image_np)
-            
-            # Generate mask
-            if 'A' in i.getbands():
-                mask = 1. - np.array(i.getchannel('A')).astype(np.float32) / 255.0
-            else:
-                mask = np.zeros((image_np.shape[0], image_np.shape[1]), dtype=np.float32)
-            
-            output_masks.append(mask)
-        
-        if len(output_images) > 1:
-            output_image = torch.cat([torch.from_numpy(i)[None, :] for i in output_images], dim=0)
-            output_mask = torch.cat([torch.from_numpy(m)[None, :] for m in output_masks], dim=0)
-        else:
-            output_image = torch.from_numpy(output_images[0])[None, :]
-            output_mask = torch.from_numpy(output_masks[0])[None, :]
+        output_image, output_mask = frames_to_tensors(frames, crop_box)
         
         ui_data = {"images": preview_results} if preview_results else {}
         return {"ui": ui_data, "result": (output_image, output_mask)}
@@ -154,10 +188,7 @@ class LoadImage:
     @classmethod
     def IS_CHANGED(cls, image, crop_data=""):
         image_path = folder_paths.get_annotated_filepath(image)
-        m = hashlib.sha256()
-        with open(image_path, 'rb') as f:
-            m.update(f.read())
-        return m.digest().hex() + str(crop_data)
+        return file_digest(image_path) + str(crop_data)
     
     @classmethod
     def VALIDATE_INPUTS(cls, image, crop_data=""):
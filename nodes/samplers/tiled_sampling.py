@@ -0,0 +1,156 @@
+"""
+Tiled (MultiDiffusion-style) sampling for ComfyUI A1rSpace extension.
+
+The model is wrapped with a unet function wrapper that splits every model
+call into overlapping latent tiles, runs them in batches of tiles and blends
+the predictions back with feathered weights. The sampler itself still sees
+the full latent, so every step is blended and peak activation memory is
+bounded by the tile size instead of the image size.
+
+Pure torch, so it runs on CPU as well as on GPU.
+"""
+import torch
+
+from ..common import get_setting
+
+
+def _tile_starts(size, tile, overlap):
+    """Start offsets covering size with tiles of the given size and overlap."""
+    if size <= tile:
+        return [0]
+    stride = max(1, tile - overlap)
+    starts = list(range(0, size - tile, stride))
+    starts.append(size - tile)
+    return starts
+
+
+def _ramp(length, overlap, fade_start, fade_end):
+    """1D blend weights, fading linearly over overlap on the inner sides."""
+    weights = torch.ones(length)
+    overlap = min(overlap, length // 2)
+    if overlap > 0:
+        ramp = torch.arange(1, overlap + 1, dtype=torch.float32) / (overlap + 1)
+        if fade_start:
+            weights[:overlap] = ramp
+        if fade_end:
+            weights[-overlap:] = torch.minimum(weights[-overlap:], ramp.flip(0))
+    return weights
+
+
+class TiledModelWrapper:
+    """
+    model_function_wrapper that evaluates the model tile by tile.
+
+    Spatial conditioning (c_concat and other [B, C, H, W] tensors) is cut
+    to the tile; per-sample conditioning, and the cond_or_uncond, uuids and
+    sigmas of transformer_options, are repeated for every tile in a batch.
+    ControlNet hints cannot be tiled, so models with control attached are
+    evaluated in one piece.
+    """
+
+    def __init__(self, tile_size=128, overlap=16, tile_batch=4, previous=None):
+        self.tile_size = max(8, int(tile_size))
+        self.overlap = max(0, int(overlap))
+        self.tile_batch = max(0, int(tile_batch))
+        self.previous = previous
+        self._weights = {}
+
+    def cache_signature(self):
+        """Settings that change the result, for the sampling cache key."""
+        return ("tiled", self.tile_size, self.overlap, self.previous)
+
+    def _call(self, apply_model, args):
+        if self.previous is not None:
+            return self.previous(apply_model, args)
+        return apply_model(args["input"], args["timestep"], **args["c"])
+
+    def _weight(self, y, x, th, tw, height, width, device, dtype):
+        key = (y > 0, y + th < height, x > 0, x + tw < width, th, tw, device, dtype)
+        weight = self._weights.get(key)
+        if weight is None:
+            wy = _ramp(th, self.overlap, key[0], key[1])
+            wx = _ramp(tw, self.overlap, key[2], key[3])
+            weight = (wy[:, None] * wx[None, :]).to(device=device, dtype=dtype)
+            self._weights[key] = weight
+        return weight
+
+    @staticmethod
+    def _tile_cond(value, tiles, batch, height, width, th, tw):
+        if not isinstance(value, torch.Tensor) or value.ndim == 0 or value.shape[0] != batch:
+            return value
+        if value.ndim == 4 and value.shape[-2:] == (height, width):
+            return torch.cat([value[:, :, y:y + th, x:x + tw] for y, x in tiles])
+        return value.repeat(len(tiles), *([1] * (value.ndim - 1)))
+
+    @staticmethod
+    def _tile_options(options, n, batch):
+        """Copy transformer_options so its per-row entries describe n stacked tiles."""
+        if not isinstance(options, dict):
+            return options
+        options = options.copy()
+        for key in ("cond_or_uncond", "uuids"):
+            if options.get(key) is not None:
+                options[key] = list(options[key]) * n
+        sigmas = options.get("sigmas")
+        if isinstance(sigmas, torch.Tensor) and sigmas.ndim == 1 and sigmas.shape[0] == batch:
+            options["sigmas"] = sigmas.repeat(n)
+        return options
+
+    def __call__(self, apply_model, args):
+        x_in = args["input"]
+        c = args["c"]
+        batch, _, height, width = x_in.shape
+        if (height <= self.tile_size and width <= self.tile_size) or c.get("control") is not None:
+            return self._call(apply_model, args)
+
+        th, tw = min(self.tile_size, height), min(self.tile_size, width)
+        tiles = [(y, x) for y in _tile_starts(height, th, self.overlap)
+                 for x in _tile_starts(width, tw, self.overlap)]
+        per_call = self.tile_batch or len(tiles)
+        timestep = args["timestep"]
+        cond_or_uncond = args.get("cond_or_uncond")
+
+        out = torch.zeros_like(x_in)
+        total = torch.zeros((1, 1, height, width), device=x_in.device, dtype=x_in.dtype)
+        for start in range(0, len(tiles), per_call):
+            chunk = tiles[start:start + per_call]
+            n = len(chunk)
+            tile_args = {
+                "input": torch.cat([x_in[:, :, y:y + th, x:x + tw] for y, x in chunk]),
+                "timestep": timestep.repeat(n) if isinstance(timestep, torch.Tensor) and timestep.ndim == 1 else timestep,
+                "c": {k: self._tile_cond(v, chunk, batch, height, width, th, tw) for k, v in c.items()},
+                # Tiles are stacked tile-major, so the cond/uncond layout repeats per tile
+                "cond_or_uncond": list(cond_or_uncond) * n if cond_or_uncond is not None else None,
+            }
+            # Attention patches chunk the stack by len(cond_or_uncond), so it must match too
+            if "transformer_options" in c:
+                tile_args["c"]["transformer_options"] = self._tile_options(c["transformer_options"], n, batch)
+            result = self._call(apply_model, tile_args)
+            for i, (y, x) in enumerate(chunk):
+                weight = self._weight(y, x, th, tw, height, width, x_in.device, x_in.dtype)
+                out[:, :, y:y + th, x:x + tw] += result[i * batch:(i + 1) * batch] * weight
+                total[:, :, y:y + th, x:x + tw] += weight
+        return out / total
+
+
+def apply_tiled_sampling(model, tile_size=1024, overlap=128, tile_batch=None):
+    """
+    Clone a ModelPatcher so its model calls run in overlapping tiles.
+
+    Args:
+        model: ModelPatcher
+        tile_size (int): Tile size in pixels (divided by 8 for the latent)
+        overlap (int): Tile overlap in pixels
+        tile_batch (int): Tiles per model call, TiledSampling.tile_batch when None, 0 for all
+
+    Returns:
+        ModelPatcher: Patched clone
+    """
+    if tile_batch is None:
+        tile_batch = int(get_setting("TiledSampling", "tile_batch", 4))
+    tiled = model.clone()
+    previous = tiled.model_options.get("model_function_wrapper")
+    tiled.set_model_unet_function_wrapper(
+        TiledModelWrapper(int(tile_size) // 8, int(overlap) // 8, tile_batch, previous=previous)
+    )
+    return tiled
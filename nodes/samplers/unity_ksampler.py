@@ -12,11 +12,221 @@ import comfy.utils
 import comfy
 import latent_preview
 
-from ..common import AlwaysEqual, ModelList, NumericConfig, to_int, to_float
+from ..common import AlwaysEqual, ModelList, NumericConfig, get_setting, to_int, to_float
+from ..common import sampling_cache, sampling_stats
+from .tiled_sampling import apply_tiled_sampling
+from ..common.latent_utils import chunked_upscale, empty_latent, expand_to_batch, latent_channels, vae_encode_cached
+
+
+def prepare_sweep_noise(latent_image, seeds):
+    """
+    Build batched noise where each batch index uses its own seed.
+
+    Index i receives exactly the noise comfy.sample.prepare_noise produces
+    for a single-image latent with seeds[i], so every image of a sweep can
+    be reproduced on its own.
+
+    Args:
+        latent_image: Latent tensor with batch size len(seeds)
+        seeds: List of integer seeds, one per batch index
+
+    Returns:
+        Noise tensor with the same shape as latent_image
+    """
+    if latent_image.shape[0] != len(seeds):
+        raise ValueError(f"Seed sweep needs {len(seeds)} latents, got batch of {latent_image.shape[0]}")
+    return torch.cat([
+        comfy.sample.prepare_noise(latent_image[i:i + 1], s, None) for i, s in enumerate(seeds)
+    ], dim=0)
+
+
+def estimate_micro_batch(model, latent_image):
+    """
+    Estimate how many latents fit into one sampling call.
+
+    Uses the model's own memory_required() estimate for one cond+uncond
+    pair against the free memory of the load device, minus weights that
+    still have to be loaded. Returns the full batch when no estimate is
+    available, leaving out-of-memory retries to split further.
+
+    Args:
+        model: ModelPatcher used for sampling
+        latent_image: Latent batch
+
+    Returns:
+        int: Micro-batch size between 1 and the batch size
+    """
+    batch = latent_image.shape[0]
+    try:
+        per_sample = model.model.memory_required([2] + list(latent_image.shape[1:]))
+        free = mm.get_free_memory(model.load_device)
+        loaded_size = getattr(model, "loaded_size", None)
+        if loaded_size is not None:
+            free -= max(0, model.model_size() - loaded_size())
+        if per_sample <= 0:
+            return batch
+        return max(1, min(batch, int(free * 0.9 // per_sample)))
+    except Exception:
+        return batch
+
+
+def _slice_batch(t, sl, batch):
+    """Slice a per-batch tensor, leaving broadcast tensors untouched."""
+    if t is None or t.ndim < 3 or t.shape[0] != batch:
+        return t
+    return t[sl]
+
+
+def sample_micro_batches(model, noise, steps, cfg, sampler_name, scheduler, positive, negative, latent_image,
+                         noise_mask=None, callback=None, **kwargs):
+    """
+    Run comfy.sample.sample in sequential micro-batches.
+
+    The full batch is always tried first, so a batch that fits gives the
+    same result as the unsplit path; split output is not bit-identical,
+    since neither model kernels nor per-step sampler noise are batch
+    invariant. Noise is prepared for the full batch before splitting, so
+    every image starts from the same noise as in a single call. After the
+    first out-of-memory error the remainder is split to the memory
+    estimate (at most half the batch), and each further error halves the
+    split for the micro-batches that have not finished yet.
+
+    Returns:
+        Sampled latent batch
+    """
+    batch = latent_image.shape[0]
+    size = batch
+    split = False
+    oom_exception = getattr(mm, "OOM_EXCEPTION", torch.cuda.OutOfMemoryError)
+
+    outputs = []
+    start = 0
+    while start < batch:
+        end = min(start + size, batch)
+        sl = slice(start, end)
+        try:
+            outputs.append(comfy.sample.sample(
+                model, noise[sl], steps, cfg, sampler_name, scheduler, positive, negative, latent_image[sl],
+                noise_mask=_slice_batch(noise_mask, sl, batch), callback=callback, **kwargs
+            ))
+            start = end
+        except oom_exception:
+            if size <= 1:
+                raise
+            # Finished micro-batches are kept, only the remainder is split further
+            mm.soft_empty_cache()
+            if split:
+                size = max(1, size // 2)
+            else:
+                size = max(1, min(size // 2, estimate_micro_batch(model, latent_image[start:])))
+                split = True
+            print(f"[A1rSpace] Out of memory while sampling, retrying with micro-batches of {size}")
+
+    return outputs[0] if len(outputs) == 1 else torch.cat(outputs, dim=0)
+
+
+def sample_with_snapshots(model, cache_key, noise, steps, cfg, sampler_name, scheduler, positive, negative,
+                          latent_image, denoise=1.0, start_step=None, last_step=None, force_full_denoise=False,
+                          noise_mask=None, callback=None, disable_pbar=False, seed=None):
+    """
+    Run comfy.sample.sample in segments split at the sampling cache snapshot steps.
+
+    Each segment but the last stops at a snapshot step with its leftover
+    noise and stores that latent; the next one continues from it without
+    adding noise, like two chained KSamplerAdvanced nodes. When the cache
+    already holds a snapshot of the same trajectory, the segments before it
+    are skipped. Runs that cannot be split are a single call.
+
+    Returns:
+        Sampled latent batch
+    """
+    first = start_step or 0
+    end = steps if last_step is None else min(steps, last_step)
+    points = sampling_cache.split_points(sampler_name, steps, first, end, noise_mask)
+
+    current, disable_noise = first, False
+    resume_step, resume_latent = sampling_cache.resume_point(model, cache_key, points)
+    if resume_step is not None:
+        print(f"[A1rSpace] Resuming sampling from cached step {resume_step}/{steps}")
+        current, latent_image, disable_noise = resume_step, resume_latent, True
+        noise = torch.zeros_like(noise)
+
+    samples = None
+    for stop in [p for p in points if p > current] + [end]:
+        segment_callback = None
+        if callback is not None:
+            # Report steps of the whole run, not of the segment
+            def segment_callback(step, x0, x, total_steps, offset=current - first):
+                callback(step + offset, x0, x, end - first)
+        samples = comfy.sample.sample(model, noise, steps, cfg, sampler_name, scheduler, positive, negative, latent_image,
+                                      denoise=denoise, disable_noise=disable_noise, start_step=current, last_step=stop,
+                                      force_full_denoise=force_full_denoise if stop == end else False,
+                                      noise_mask=noise_mask, callback=segment_callback,
+                                      disable_pbar=disable_pbar, seed=seed)
+        if stop != end:
+            sampling_cache.store(model, cache_key, stop, False, samples)
+            current, latent_image, disable_noise = stop, samples, True
+            noise = torch.zeros_like(noise)
+    return samples
+
+
+class ConvergenceStop(Exception):
+    """Raised from the sampler callback to end sampling with the current x0."""
+
+    def __init__(self, x0):
+        super().__init__("sampling converged")
+        self.x0 = x0
+
+
+class EarlyStopPolicy:
+    """
+    Stop sampling once the denoised estimate stops changing.
+
+    After every step the relative change ||x0 - x0_prev|| / ||x0_prev|| is
+    compared with threshold. When it stays below for patience consecutive
+    steps (and at least min_progress of the steps have run), sampling ends
+    and the current x0 is returned. x0 is the model's full-denoise
+    prediction, i.e. exactly what a final step to sigma 0 produces.
+    """
+
+    def __init__(self, threshold=0.002, patience=3, min_progress=0.5):
+        self.threshold = threshold
+        self.patience = max(1, int(patience))
+        self.min_progress = min_progress
+        self.reports = []
+        self._reset()
+
+    def _reset(self):
+        self._prev = None
+        self._calm = 0
+
+    def wrap_callback(self, callback):
+        """Wrap a sampler callback with the convergence check."""
+        self._reset()
+
+        def early_stop_callback(step, x0, x, total_steps):
+            if callback is not None:
+                callback(step, x0, x, total_steps)
+            self.check(step, x0, total_steps)
+        return early_stop_callback
+
+    def check(self, step, x0, total_steps):
+        prev = self._prev
+        self._prev = x0.detach().clone()
+        if prev is None or step + 1 >= total_steps:
+            return
+        change = (torch.linalg.vector_norm(x0 - prev) / torch.linalg.vector_norm(prev).clamp_min(1e-8)).item()
+        self._calm = self._calm + 1 if change < self.threshold else 0
+        if self._calm >= self.patience and step + 1 >= self.min_progress * total_steps:
+            self.reports.append({"steps_run": step + 1, "steps_total": total_steps,
+                                 "steps_saved": total_steps - step - 1})
+            self._prev = None
+            raise ConvergenceStop(x0)
 
 
 def common_ksampler(model, seed, steps, cfg, sampler_name, scheduler, positive, negative, latent, 
-                    denoise=1.0, disable_noise=False, start_step=None, last_step=None, force_full_denoise=False):
+                    denoise=1.0, disable_noise=False, start_step=None, last_step=None, force_full_denoise=False,
+                    seeds=None, micro_batch=None, early_stop=None):
     """
     Common KSampler function used by all sampling nodes.
     
@@ -35,27 +245,92 @@ def common_ksampler(model, seed, steps, cfg, sampler_name, scheduler, positive,
         start_step: Optional starting step
         last_step: Optional ending step
         force_full_denoise: Whether to force full denoising
+        seeds: Optional per-batch-index seeds (seed sweep), overrides seed for noise
+        micro_batch: Split the batch to fit memory, defaults to Sampling.micro_batch in config.json
+        early_stop: Optional EarlyStopPolicy, ignored when the batch is split into micro-batches
+
+    With SamplingCache.enabled, runs of single-step deterministic samplers
+    are split at snapshot steps and resume from the latest snapshot of an
+    earlier run on the same trajectory; identical runs reuse the final
+    latent. See nodes/common/sampling_cache.py.
     
     Returns:
         Tuple containing the sampled latent
     """
+    timer = sampling_stats.start_run(steps, latent["samples"].shape[0])
+
     latent_image = latent["samples"]
     latent_image = comfy.sample.fix_empty_latent_channels(model, latent_image)
 
     if disable_noise:
         noise = torch.zeros(latent_image.size(), dtype=latent_image.dtype, layout=latent_image.layout, device="cpu")
+    elif seeds:
+        noise = prepare_sweep_noise(latent_image, seeds)
     else:
         batch_inds = latent.get("batch_index")
         noise = comfy.sample.prepare_noise(latent_image, seed, batch_inds)
 
     noise_mask = latent.get("noise_mask")
 
+    if micro_batch is None:
+        micro_batch = bool(get_setting("Sampling", "micro_batch", False))
+
     callback = latent_preview.prepare_callback(model, steps)
     disable_pbar = not comfy.utils.PROGRESS_BAR_ENABLED
-    samples = comfy.sample.sample(model, noise, steps, cfg, sampler_name, scheduler, positive, negative, latent_image,
-                                    denoise=denoise, disable_noise=disable_noise, start_step=start_step, last_step=last_step,
-                                    force_full_denoise=force_full_denoise, noise_mask=noise_mask, callback=callback, 
-                                    disable_pbar=disable_pbar, seed=seed)
+    split = micro_batch and latent_image.shape[0] > 1
+
+    cache_key = None
+    if sampling_cache.is_enabled() and not split and early_stop is None and not disable_noise:
+        try:
+            cache_key = sampling_cache.run_key(model, positive, negative, latent_image, latent, seed, seeds,
+                                               sampler_name, scheduler, steps, cfg, denoise, start_step)
+        except Exception as e:
+            print(f"[A1rSpace] Sampling cache skipped: {e}")
+
+    if cache_key is not None:
+        # A run that ends before the last step without forcing full denoise returns its leftover noise
+        end = steps if last_step is None else min(steps, last_step)
+        full_denoise = force_full_denoise or end >= steps
+        cached = sampling_cache.lookup(model, cache_key, end, full_denoise)
+        if cached is not None:
+            if timer is not None:
+                timer.setup_done()
+                timer.finish()
+            out = latent.copy()
+            out["samples"] = cached
+            return (out,)
+
+    if timer is not None:
+        timer.setup_done()
+        callback = timer.wrap_callback(callback)
+    if split:
+        samples = sample_micro_batches(model, noise, steps, cfg, sampler_name, scheduler, positive, negative, latent_image,
+                                        denoise=denoise, disable_noise=disable_noise, start_step=start_step, last_step=last_step,
+                                        force_full_denoise=force_full_denoise, noise_mask=noise_mask, callback=callback,
+                                        disable_pbar=disable_pbar, seed=seed)
+    elif cache_key is not None:
+        samples = sample_with_snapshots(model, cache_key, noise, steps, cfg, sampler_name, scheduler, positive, negative,
+                                        latent_image, denoise=denoise, start_step=start_step, last_step=last_step,
+                                        force_full_denoise=force_full_denoise, noise_mask=noise_mask, callback=callback,
+                                        disable_pbar=disable_pbar, seed=seed)
+    else:
+        if early_stop is not None:
+            callback = early_stop.wrap_callback(callback)
+        try:
+            samples = comfy.sample.sample(model, noise, steps, cfg, sampler_name, scheduler, positive, negative, latent_image,
+                                            denoise=denoise, disable_noise=disable_noise, start_step=start_step, last_step=last_step,
+                                            force_full_denoise=force_full_denoise, noise_mask=noise_mask, callback=callback, 
+                                            disable_pbar=disable_pbar, seed=seed)
+        except ConvergenceStop as stop:
+            # Same post-processing comfy applies to the final sampler output
+            samples = model.model.process_latent_out(stop.x0.to(torch.float32)).to(mm.intermediate_device())
+            report = early_stop.reports[-1]
+            print(f"[A1rSpace] Early stop after {report['steps_run']}/{report['steps_total']} steps "
+                  f"({report['steps_saved']} saved)")
+    if cache_key is not None:
+        sampling_cache.store(model, cache_key, end, full_denoise, samples)
+    if timer is not None:
+        timer.finish()
     out = latent.copy()
     out["samples"] = samples
     return (out,)
@@ -88,9 +363,69 @@ class SamplerPicker:
         return (sampler_name, scheduler)
 
 
+def parse_seed_sweep(sweep, seed, seed_list, seed_count):
+    """
+    Resolve the seed sweep widgets into a list of seeds.
+
+    Args:
+        sweep: "disabled", "seed list" or "start + count"
+        seed: Start seed for "start + count"
+        seed_list: Comma or whitespace separated seeds for "seed list"
+        seed_count: Number of consecutive seeds for "start + count"
+
+    Returns:
+        List of seeds, or None when the sweep is disabled
+    """
+    if sweep == "seed list":
+        parts = [p for p in str(seed_list or "").replace(",", " ").split() if p]
+        seeds = [to_int("seed_list", p) for p in parts]
+        if not seeds:
+            raise ValueError("Seed sweep 'seed list' needs at least one seed")
+        return seeds
+    if sweep == "start + count":
+        count = max(1, to_int("seed_count", seed_count))
+        return [(seed + i) & 0xffffffffffffffff for i in range(count)]
+    return None
+
+
+def hires_fix(model, seed, steps, cfg, sampler_name, scheduler, positive, negative, latent,
+              upscale_method, upscale_by, hires_steps, hires_denoise, seeds=None, early_stop=None,
+              hires_model=None):
+    """
+    Two-pass hires fix: full text-to-image pass, latent upscale, refine pass.
+
+    Both passes share the same model patcher and conditioning objects, so
+    the model stays loaded and nothing is round-tripped through the graph.
+    The first-pass latent is dropped as soon as it is upscaled. The second
+    pass draws noise from the same seed(s) at the upscaled shape, which
+    keeps results identical to chaining two samplers with a latent upscale.
+    hires_model, when given, replaces model for the second pass (e.g. a
+    tiled clone from apply_tiled_sampling).
+
+    Returns:
+        Tuple containing the refined latent
+    """
+    (first,) = common_ksampler(model, seed, steps, cfg, sampler_name, scheduler, positive, negative,
+                               latent, denoise=1.0, seeds=seeds, early_stop=early_stop)
+
+    samples = first.pop("samples")
+    upscaled = chunked_upscale(
+        samples,
+        round(samples.shape[3] * upscale_by),
+        round(samples.shape[2] * upscale_by),
+        upscale_method,
+        "disabled"
+    )
+    del samples
+    first["samples"] = upscaled
+
+    return common_ksampler(hires_model or model, seed, hires_steps, cfg, sampler_name, scheduler, positive, negative,
+                           first, denoise=hires_denoise, seeds=seeds, early_stop=early_stop)
+
+
 class UnityKSampler:
     """
-    Unified KSampler with three modes: text to image, image to image, and latent upscale.
+    Unified KSampler with four modes: text to image, image to image, latent upscale and hires fix.
     Combines multiple workflows into a single versatile sampling node.
     """
 
@@ -98,7 +433,7 @@ class UnityKSampler:
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "mode": (["text to image", "image to image", "latent upscale"], {"default": "text to image"}),
+                "mode": (["text to image", "image to image", "latent upscale", "hires fix"], {"default": "text to image"}),
                 "model": ("MODEL",),
                 "positive": ("CONDITIONING",),
                 "negative": ("CONDITIONING",),
@@ -120,7 +455,25 @@ class UnityKSampler:
                 # Latent Upscale mode - force input (no widget)
                 "latent": ("LATENT",),
                 "upscale_method": ("UPSCALEMETHOD", {"default": "nearest-exact", "tooltip": "Upscale method to use, if not provided, will be default to 'nearest-exact'", "forceInput": True}),
-                "upscale_by": ("FLOAT", {"default": 1.5, "tooltip": "Upscale by factor, if not provided, will be default to 1.5", "forceInput": True})
+                "upscale_by": ("FLOAT", {"default": 1.5, "tooltip": "Upscale by factor, if not provided, will be default to 1.5", "forceInput": True}),
+                # Seed sweep - one batched run, one seed per image
+                "seed_sweep": (["disabled", "seed list", "start + count"], {"default": "disabled", "tooltip": "Sample one batch where each image uses its own seed"}),
+                "seed_list": ("STRING", {"default": "", "tooltip": "Seeds for 'seed list', separated by commas"}),
+                "seed_count": ("INT", {"default": 4, "min": 1, "max": 64, "tooltip": "Number of consecutive seeds from 'seed' for 'start + count'"}),
+                # Hires fix mode - second pass settings
+                "hires_steps": ("INT", NumericConfig.default_int(default=15, min_val=1, max_val=60, step=1)),
+                "hires_denoise": ("FLOAT", NumericConfig.default_float(default=0.5, max_val=1.0, step=0.05)),
+                # Step range - run only part of the schedule, like KSamplerAdvanced
+                "start_step": ("INT", {"default": 0, "min": 0, "max": 10000, "tooltip": "First step to run; ignored in hires fix mode"}),
+                "last_step": ("INT", {"default": 10000, "min": 0, "max": 10000, "tooltip": "Step to stop at, fully denoised; ignored in hires fix mode"}),
+                # Early stop - end sampling once x0 stops changing
+                "early_stop": ("BOOLEAN", {"default": False, "tooltip": "Finish early when the denoised latent stops changing"}),
+                "early_stop_threshold": ("FLOAT", {"default": 0.002, "min": 0.0001, "max": 0.1, "step": 0.0001, "tooltip": "Relative change of x0 between steps counted as converged"}),
+                "early_stop_patience": ("INT", {"default": 3, "min": 1, "max": 20, "tooltip": "Converged steps in a row before stopping"}),
+                # Tiled sampling - latent upscale and hires fix second pass
+                "tiled": ("BOOLEAN", {"default": False, "tooltip": "Run the model in overlapping tiles to bound memory at large resolutions"}),
+                "tile_size": ("INT", {"default": 1024, "min": 256, "max": 4096, "step": 64, "tooltip": "Tile size in pixels"}),
+                "tile_overlap": ("INT", {"default": 128, "min": 0, "max": 512, "step": 16, "tooltip": "Overlap between neighbouring tiles in pixels"}),
             }
         }
     
@@ -128,20 +481,29 @@ class UnityKSampler:
     FUNCTION = "sample"
     
     CATEGORY = "A1rSpace/KSampler"
-    DESCRIPTION = """Unified sampling node with three modes:
+    DESCRIPTION = """Unified sampling node with four modes:
 - Text to Image: Generate from empty latent (requires width/height/batch_size)
 - Image to Image: Generate from encoded image (requires pixels/vae, uses denoise)
-- Latent Upscale: Upscale existing latent (requires latent/upscale_method/upscale_by)"""
+- Latent Upscale: Upscale existing latent (requires latent/upscale_method/upscale_by)
+- Hires Fix: Text to image, latent upscale and a second pass with hires_steps/hires_denoise in one node
+Seed sweep replaces batch_size with one image per seed, each reproducible on its own.
+start_step/last_step run part of the schedule; with SamplingCache enabled, reruns that only move last_step resume from a snapshot.
+Tiled sampling runs the latent upscale / hires fix pass in overlapping tiles for very large resolutions."""
 
     def sample(self, mode, model, positive, negative, sampler, scheduler, seed, steps, cfg, denoise, 
                 width=None, height=None, batch_size=None,
                 pixels=None, vae=None,
-                latent=None, upscale_method=None, upscale_by=None):
+                latent=None, upscale_method=None, upscale_by=None,
+                seed_sweep="disabled", seed_list="", seed_count=4,
+                hires_steps=15, hires_denoise=0.5,
+                start_step=0, last_step=10000,
+                early_stop=False, early_stop_threshold=0.002, early_stop_patience=3,
+                tiled=False, tile_size=1024, tile_overlap=128):
         """
         Execute sampling based on selected mode.
         
         Args:
-            mode: Operation mode (text to image, image to image, latent upscale)
+            mode: Operation mode (text to image, image to image, latent upscale, hires fix)
             model: The model to use for sampling
             positive: Positive conditioning
             negative: Negative conditioning
@@ -157,8 +519,21 @@ class UnityKSampler:
             pixels: Input image for image to image mode
             vae: VAE for encoding pixels in image to image mode
             latent: Input latent for latent upscale mode
-            upscale_method: Upscale method for latent upscale mode
-            upscale_by: Upscale factor for latent upscale mode
+            upscale_method: Upscale method for latent upscale and hires fix modes
+            upscale_by: Upscale factor for latent upscale and hires fix modes
+            seed_sweep: Seed sweep mode (disabled, seed list, start + count)
+            seed_list: Seeds for the "seed list" sweep
+            seed_count: Number of seeds for the "start + count" sweep
+            hires_steps: Second pass steps for hires fix mode
+            hires_denoise: Second pass denoise for hires fix mode
+            start_step: First step to run, except in hires fix mode
+            last_step: Step to stop at with full denoise, except in hires fix mode
+            early_stop: Stop once x0 converges, reporting the steps saved
+            early_stop_threshold: Relative x0 change treated as converged
+            early_stop_patience: Converged steps in a row before stopping
+            tiled: Tiled sampling for latent upscale mode and the hires fix second pass
+            tile_size: Tile size in pixels for tiled sampling
+            tile_overlap: Tile overlap in pixels for tiled sampling
         
         Returns:
             Tuple containing the sampled latent
@@ -172,8 +547,12 @@ class UnityKSampler:
         sampler = str(sampler)
         scheduler = str(scheduler)
 
+        seeds = parse_seed_sweep(seed_sweep, seed, seed_list, seed_count)
+        if seeds:
+            batch_size = len(seeds)
+
         # Prepare latent based on selected mode
-        if mode == "text to image":
+        if mode in ("text to image", "hires fix"):
             # Text to image mode: Create empty latent from dimensions
             if width is None:
                 width = 1024
@@ -186,8 +565,10 @@ class UnityKSampler:
             if batch_size_value < 1:
                 batch_size_value = 1
             
-            # Create empty latent (same as EmptyLatentImage node)
-            latent = torch.zeros([batch_size_value, 4, height // 8, width // 8], device=mm.intermediate_device())
+            # Create empty latent with the model's channel count (zero-copy view,
+            # only read by the sampler and never returned)
+            latent = empty_latent(batch_size_value, height, width, channels=latent_channels(model),
+                                  device=mm.intermediate_device())
             latent_image = {"samples": latent}
             
             # Text to image always uses full denoise
@@ -202,19 +583,12 @@ class UnityKSampler:
             if batch_size_value < 1:
                 batch_size_value = 1
             
-            # Encode pixels to latent (same as VAEEncode node)
-            t = vae.encode(pixels[:,:,:,:3])
+            # Encode pixels to latent (same as VAEEncode node), skipped when unchanged
+            t = vae_encode_cached(vae, pixels)
             
             # Adjust batch size if needed
-            current_batch = t.shape[0]
-            if batch_size_value != current_batch:
-                if batch_size_value > current_batch:
-                    # Repeat to match requested batch size
-                    repeat_times = (batch_size_value + current_batch - 1) // current_batch
-                    t = t.repeat(repeat_times, 1, 1, 1)[:batch_size_value]
-                else:
-                    # Trim to match requested batch size
-                    t = t[:batch_size_value]
+            if batch_size_value != t.shape[0]:
+                t = expand_to_batch(t, batch_size_value)
             
             latent_image = {"samples": t}
             denoise_value = denoise
@@ -228,33 +602,83 @@ class UnityKSampler:
             
             # Upscale latent (same as LatentUpscale node)
             samples = latent["samples"]
-            s = comfy.utils.common_upscale(
+            s = chunked_upscale(
                 samples, 
                 round(samples.shape[3] * upscale_by), 
                 round(samples.shape[2] * upscale_by), 
                 method, 
                 "disabled"
             )
+            if seeds and s.shape[0] != len(seeds):
+                s = expand_to_batch(s, len(seeds))
             latent_image = {"samples": s}
             denoise_value = denoise
             
         else:
             raise ValueError(f"Unknown mode: {mode}")
 
-        # Execute sampling with prepared latent
-        result = common_ksampler(
-            model=model,
-            seed=seed,
-            steps=steps,
-            cfg=cfg,
-            sampler_name=sampler,
-            scheduler=scheduler,
-            positive=positive,
-            negative=negative,
-            latent=latent_image,
-            denoise=denoise_value
-        )
+        policy = None
+        if early_stop:
+            policy = EarlyStopPolicy(threshold=to_float("early_stop_threshold", early_stop_threshold),
+                                     patience=to_int("early_stop_patience", early_stop_patience))
+
+        tiled_model = None
+        if tiled and mode in ("latent upscale", "hires fix"):
+            tiled_model = apply_tiled_sampling(model, to_int("tile_size", tile_size), to_int("tile_overlap", tile_overlap))
+
+        timing = sampling_stats.is_enabled()
+        if timing:
+            sampling_stats.begin_node()
+
+        if mode == "hires fix":
+            result = hires_fix(
+                model=model,
+                seed=seed,
+                steps=steps,
+                cfg=cfg,
+                sampler_name=sampler,
+                scheduler=scheduler,
+                positive=positive,
+                negative=negative,
+                latent=latent_image,
+                upscale_method=str(upscale_method) if upscale_method is not None else "nearest-exact",
+                upscale_by=to_float("upscale_by", upscale_by) if upscale_by is not None else 1.5,
+                hires_steps=to_int("hires_steps", hires_steps),
+                hires_denoise=to_float("hires_denoise", hires_denoise),
+                seeds=seeds,
+                early_stop=policy,
+                hires_model=tiled_model
+            )
+        else:
+            # The full schedule keeps the plain KSampler path
+            start_value = to_int("start_step", start_step)
+            last_value = to_int("last_step", last_step)
+            # Execute sampling with prepared latent
+            result = common_ksampler(
+                model=tiled_model or model,
+                seed=seed,
+                steps=steps,
+                cfg=cfg,
+                sampler_name=sampler,
+                scheduler=scheduler,
+                positive=positive,
+                negative=negative,
+                latent=latent_image,
+                denoise=denoise_value,
+                start_step=start_value if start_value > 0 else None,
+                last_step=last_value if last_value < steps else None,
+                force_full_denoise=True,
+                seeds=seeds,
+                early_stop=policy
+            )
 
+        ui = {}
+        if timing:
+            ui["sampling_stats"] = sampling_stats.end_node()
+        if policy is not None:
+            ui["early_stop"] = policy.reports
+        if ui:
+            return {"ui": ui, "result": result}
         return result
 
 
@@ -78,6 +78,7 @@ def _lazy_load_huggingface_hub():
 from ..common.shared_utils import print_log, TextCleanerMixin
 from ..common.config_loader import load_config
 from ..common.joytag_model import VisionModel
+from ..common.memory_budget import get_cache
 
 # Import folder_paths at module level for path operations
 import folder_paths
@@ -89,7 +90,10 @@ lang_list = {
     "English": "en",
 }
 
-cache_result = {}
+cache_result = get_cache("translation")
+
+# Tagger models are shared by all TextTagBox instances
+_tagger_cache = get_cache("tagger")
 
 def create_mission_key(from_lang, to_lang, text, platform):
     """Generate a unique cache key for translation missions."""
@@ -228,9 +232,10 @@ class TextTranslate:
         ui_msg = ""
         translate_str = ""
 
-        if mission_key in cache_result:
+        cached = cache_result.get(mission_key)
+        if cached is not None:
             print_log("aim cache")
-            translate_str = cache_result[mission_key]
+            translate_str = cached
         else:
             if platform == "Baidu":
                 translate_str, ui_msg = self.baidu_translate(from_lang, to_lang, text)
@@ -240,7 +245,7 @@ class TextTranslate:
                 translate_str, ui_msg = ("", "Haven't platform")
 
             if translate_str != "":
-                cache_result[mission_key] = translate_str
+                cache_result.put(mission_key, translate_str)
 
         return {
             "ui": {"text": (ui_msg,)},
@@ -341,8 +346,6 @@ class TextTagBox:
         else:
             self.joytag_model_path = os.path.join(folder_paths.models_dir, "text_encoders", "joytag")
         os.makedirs(self.joytag_model_path, exist_ok=True)
-        self.joytag_loaded_model = None
-        self.joytag_tag_list = None
         
         # WD14 paths
         if "wd14_tagger" in folder_paths.folder_names_and_paths:
@@ -414,14 +417,23 @@ class TextTagBox:
     DESCRIPTION = "Extract image tags using JoyTag or WD14Tagger vision models."
 
     def ensure_joytag_loaded(self):
-        """Load JoyTag model if not already loaded."""
-        if self.joytag_loaded_model is not None:
-            return True
+        """
+        Load JoyTag model if not already loaded.
+
+        The model lives only in the tagger cache, so an eviction by the
+        memory budget really frees it; callers fetch it on every use.
+
+        Returns:
+            tuple: (model, tag_list), or None when it could not be loaded
+        """
+        cached = _tagger_cache.get("joytag")
+        if cached is not None:
+            return cached
         
         TVF = _lazy_load_joytag()
         if TVF is None:
             print_log("JoyTag dependencies (torchvision) not available")
-            return False
+            return None
         
         required_files = ["model.safetensors", "config.json", "top_tags.txt"]
         model_files_exist = all(os.path.exists(os.path.join(self.joytag_model_path, f)) for f in required_files)
@@ -430,7 +442,7 @@ class TextTagBox:
             snapshot_download = _lazy_load_huggingface_hub()
             if snapshot_download is None:
                 print_log("huggingface_hub not available for model download")
-                return False
+                return None
             
             print_log("Downloading JoyTag model...")
             try:
@@ -444,22 +456,24 @@ class TextTagBox:
             except Exception as e:
                 print_log(f"Error downloading JoyTag model: {e}")
                 traceback.print_exc()
-                return False
+                return None
         
         try:
-            self.joytag_loaded_model = VisionModel.load_model(self.joytag_model_path, device="cuda")
-            self.joytag_loaded_model.eval()
+            joytag_model = VisionModel.load_model(self.joytag_model_path, device="cuda")
+            joytag_model.eval()
             
             with open(os.path.join(self.joytag_model_path, "top_tags.txt"), "r", encoding="utf-8") as f:
-                self.joytag_tag_list = [line.strip() for line in f if line.strip()]
+                tag_list = [line.strip() for line in f if line.strip()]
+
+            loaded = _tagger_cache.put("joytag", (joytag_model, tag_list))
                 
             print_log("JoyTag model loaded successfully")
-            return True
+            return loaded
             
         except Exception as e:
             print_log(f"Error loading JoyTag model: {e}")
             traceback.print_exc()
-            return False
+            return None
 
     def prepare_joytag_image(self, image, target_size: int):
         """Prepare image for JoyTag model."""
@@ -489,18 +503,20 @@ class TextTagBox:
 
     def predict_joytag(self, image, threshold, replace_underscore, trailing_comma, exclude_tags):
         """Run JoyTag prediction."""
-        if not self.ensure_joytag_loaded():
+        loaded = self.ensure_joytag_loaded()
+        if loaded is None:
             return "Error: Could not load JoyTag model"
+        joytag_model, tag_list = loaded
 
         try:
-            image_tensor = self.prepare_joytag_image(image, self.joytag_loaded_model.image_size)
+            image_tensor = self.prepare_joytag_image(image, joytag_model.image_size)
             batch = {"image": image_tensor.unsqueeze(0).to("cuda")}
 
             with torch.no_grad(), torch.amp.autocast_mode.autocast("cuda", enabled=True):
-                preds = self.joytag_loaded_model(batch)
+                preds = joytag_model(batch)
                 tag_preds = preds['tags'].sigmoid().cpu()
 
-            scores = {self.joytag_tag_list[i]: tag_preds[0][i] for i in range(len(self.joytag_tag_list))}
+            scores = {tag_list[i]: tag_preds[0][i] for i in range(len(tag_list))}
             predicted_tags = [tag for tag, score in scores.items() if score > threshold]
             
             if replace_underscore:
@@ -568,7 +584,14 @@ class TextTagBox:
             onnx_path = os.path.join(self.wd14_models_dir, f"{model_name}.onnx")
             csv_path = os.path.join(self.wd14_models_dir, f"{model_name}.csv")
             
-            model = InferenceSession(onnx_path, providers=self.ort_providers)
+            model = _tagger_cache.get(f"wd14/{model_name}")
+            if model is None:
+                model = InferenceSession(onnx_path, providers=self.ort_providers)
+                # Weights live in VRAM when CUDA is active, count them there so free_memory can release them
+                size = os.path.getsize(onnx_path)
+                on_cuda = "CUDAExecutionProvider" in model.get_providers()
+                _tagger_cache.put(f"wd14/{model_name}", model,
+                                  nbytes=0 if on_cuda else size, device_bytes=size if on_cuda else 0)
             
             input_meta = model.get_inputs()[0]
             height = input_meta.shape[1]
@@ -4,6 +4,7 @@ Transform nodes - latent/image transformations and switches.
 Complete set of transform, upscale, and switch nodes for ComfyUI_A1rSpace.
 """
 from ..common.shared_utils import NumericConfig, UpscaleMethods
+from ..common.latent_utils import chunked_upscale
 import torch
 import folder_paths
 import numpy as np
@@ -194,7 +195,6 @@ class LatentUpscaleTransform:
     CATEGORY = "A1rSpace/Transform"
 
     def upscale(self, samples, mode, upscale_method, width, height, scale_by):
-        comfy_utils = _get_comfy_utils()
         s = samples.copy()
 
         if mode == 'Scale with size':
@@ -204,11 +204,11 @@ class LatentUpscaleTransform:
                 width = max(1, round(s["samples"].shape[-1] * height / s["samples"].shape[-2]))
             elif height == 0:
                 height = max(1, round(s["samples"].shape[-2] * width / s["samples"].shape[-1]))
-            s["samples"] = comfy_utils.common_upscale(s["samples"], width, height, upscale_method, "center")
+            s["samples"] = chunked_upscale(s["samples"], width, height, upscale_method, "center")
         else:
             s_width = round(s["samples"].shape[-1] * scale_by)
             s_height = round(s["samples"].shape[-2] * scale_by)
-            s["samples"] = comfy_utils.common_upscale(s["samples"], s_width, s_height, upscale_method, "disabled")
+            s["samples"] = chunked_upscale(s["samples"], s_width, s_height, upscale_method, "disabled")
         return (s,)
 
 # ========== Switch Nodes ==========
@@ -1,13 +1,251 @@
+import io
+import json
+import time
+import struct
+import asyncio
+import threading
 import latent_preview
 import torch
+import torch.nn.functional as F
+import comfy.sd
 import comfy.utils
+from PIL import Image, ImageOps
 import server
 from protocol import BinaryEventTypes
 
+from ..common import get_setting
+from ..common.memory_budget import get_cache
+from ..common.preview_worker import get_worker
+
+
+class PreviewThrottle:
+    """
+    Decide which sampling steps get a decoded preview.
+
+    Combines three limits, settings in the "Preview" section of config.json:
+    - max_fps: at most this many previews per second (0 disables)
+    - every_n_steps: only every n-th step is considered
+    - adaptive: skip a preview while decoding would take more than
+      adaptive_ratio of the wall time since the previous preview, so fast
+      steps drop previews instead of being slowed down by them
+    The final step always gets a preview.
+    """
+
+    def __init__(self, max_fps=4.0, every_n_steps=1, adaptive=True, adaptive_ratio=0.25):
+        self.min_interval = 1.0 / max_fps if max_fps and max_fps > 0 else 0.0
+        self.every_n_steps = max(1, int(every_n_steps))
+        self.adaptive = adaptive
+        self.adaptive_ratio = adaptive_ratio
+        self.decode_cost = 0.0
+        self.last_preview = None
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_fps=float(get_setting("Preview", "max_fps", 4.0)),
+            every_n_steps=int(get_setting("Preview", "every_n_steps", 1)),
+            adaptive=bool(get_setting("Preview", "adaptive", True)),
+            adaptive_ratio=float(get_setting("Preview", "adaptive_ratio", 0.25)),
+        )
+
+    def should_preview(self, step, total_steps, now):
+        if step + 1 >= total_steps:
+            return True
+        if (step + 1) % self.every_n_steps:
+            return False
+        if self.last_preview is None:
+            return True
+        elapsed = now - self.last_preview
+        if elapsed < self.min_interval:
+            return False
+        if self.adaptive and self.decode_cost > self.adaptive_ratio * elapsed:
+            return False
+        return True
+
+    def record(self, started, finished):
+        """Record one decode, keeping a moving average of its cost."""
+        cost = finished - started
+        self.decode_cost = cost if self.decode_cost == 0.0 else 0.7 * self.decode_cost + 0.3 * cost
+        self.last_preview = finished
+
+
+OBSERVER_CLASS = "A1r Latent Observer"
+OBSERVER_DECODERS = ["Latent2RGB", "TAESD"]
+
+# TAESD decoder modules keyed by (name, device), plus names without files
+_taesd_cache = get_cache("taesd_preview", max_entries=4)
+_taesd_missing = set()
+
+
+def get_taesd_previewer(latent_format, device):
+    """
+    Build a TAESD previewer for a latent format, or None when unavailable.
+
+    Weights are assembled by ModelLoaderBase.load_taesd; the decoder module
+    is cached per latent format and device, so only the first preview of a
+    format pays the load.
+    """
+    name = getattr(latent_format, "taesd_decoder_name", None)
+    if not name or not hasattr(latent_preview, "TAESDPreviewerImpl"):
+        return None
+    if name.endswith("_decoder"):
+        name = name[:-len("_decoder")]
+    if name in _taesd_missing:
+        return None
+
+    key = (name, str(device))
+    taesd = _taesd_cache.get(key)
+    if taesd is None:
+        from ..common.model_loader import ModelLoaderBase
+        try:
+            vae = comfy.sd.VAE(sd=ModelLoaderBase.load_taesd(name))
+        except Exception as e:
+            print(f"[A1rSpace] TAESD preview unavailable for {name}: {e}")
+            _taesd_missing.add(name)
+            return None
+        # VAE() casts to the VAE dtype (bf16 on recent GPUs), previews decode fp32 x0
+        taesd = vae.first_stage_model.to(device=device, dtype=torch.float32).eval()
+        # VAE() loads the raw-latent scale/shift, but sampler x0 has already been
+        # through process_latent_in; ComfyUI's previewer decodes with 1 and 0
+        with torch.no_grad():
+            taesd.vae_scale.fill_(1.0)
+            taesd.vae_shift.fill_(0.0)
+        _taesd_cache.put(key, taesd)
+    return latent_preview.TAESDPreviewerImpl(taesd)
+
+# Observer preview formats and their mime types
+PREVIEW_FORMATS = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+DEFAULT_PREVIEW_SETTINGS = (512, "JPEG", 80)
+
+
+def observer_settings(inputs):
+    """Read (max_edge, format, quality) from an observer node's prompt inputs."""
+    max_edge, fmt, quality = DEFAULT_PREVIEW_SETTINGS
+    if isinstance(inputs.get("max_edge"), (int, float)):
+        max_edge = max(16, int(inputs["max_edge"]))
+    if inputs.get("format") in PREVIEW_FORMATS:
+        fmt = inputs["format"]
+    if isinstance(inputs.get("quality"), (int, float)):
+        quality = min(100, max(1, int(inputs["quality"])))
+    return max_edge, fmt, quality
+
+
+def downscale_latent(x0, max_edge, decoder_scale=1):
+    """
+    Shrink the first latent of a batch so the decoded preview fits max_edge.
+
+    Done on the tensor, so the decoder and PIL only ever see the small image.
+    Video latents [B, C, T, H, W] keep their first frame only, as the
+    preview shows a single image.
+    """
+    x0 = x0[:1]
+    if x0.ndim == 5:
+        x0 = x0[:, :, :1]
+    elif x0.ndim != 4:
+        return x0
+    height, width = x0.shape[-2:]
+    edge = max(height, width) * decoder_scale
+    if edge <= max_edge:
+        return x0
+    factor = max_edge / edge
+    size = (max(1, int(height * factor)), max(1, int(width * factor)))
+    if x0.ndim == 5:
+        return F.interpolate(x0[:, :, 0], size=size, mode="area").unsqueeze(2)
+    return F.interpolate(x0, size=size, mode="area")
+
+
+def encode_preview(image, max_edge, fmt, quality):
+    """Encode a PIL preview with the observer's size, format and quality."""
+    if max(image.size) > max_edge:
+        image = ImageOps.contain(image, (max_edge, max_edge), Image.Resampling.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, quality=quality)
+    return buffer.getvalue()
+
+
+def send_encoded_preview(s, data, fmt, metadata, client_id):
+    """
+    Send pre-encoded preview bytes in ComfyUI's PREVIEW_IMAGE_WITH_METADATA layout.
+
+    The server's own path always re-encodes at quality 95, so the message is
+    assembled here and handed straight to send_bytes.
+    """
+    metadata = dict(metadata, image_type=PREVIEW_FORMATS[fmt])
+    metadata_json = json.dumps(metadata).encode("utf-8")
+    payload = struct.pack(">I", len(metadata_json)) + metadata_json + data
+    asyncio.run_coroutine_threadsafe(
+        s.send_bytes(BinaryEventTypes.PREVIEW_IMAGE_WITH_METADATA, payload, sid=client_id), s.loop
+    )
+
+
+class ObserverIndex:
+    """
+    Latent Observer node ids per prompt_id.
+
+    Each prompt's graph is scanned once, the first time it samples; later
+    lookups for the same prompt are dictionary hits. Entries of prompts
+    that are no longer running are dropped on the next lookup.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def targets(self, currently_running):
+        """
+        Get the observers of all running prompts.
+
+        Args:
+            currently_running: PromptQueue.currently_running,
+                {task_id: (number, prompt_id, prompt, extra_data, outputs_to_execute)}
+
+        Returns:
+            list: (prompt_id, client_id, nodes, use_taesd) for prompts with observers and
+                  a client, nodes being (node_id, (max_edge, format, quality)) pairs
+        """
+        tasks = list(currently_running.values())
+        result = []
+        with self._lock:
+            active = set()
+            for task in tasks:
+                prompt_id = task[1]
+                active.add(prompt_id)
+                entry = self._entries.get(prompt_id)
+                if entry is None:
+                    nodes = tuple(
+                        (node_id, observer_settings(node_data.get("inputs", {})))
+                        for node_id, node_data in task[2].items()
+                        if isinstance(node_data, dict) and node_data.get("class_type") == OBSERVER_CLASS
+                    )
+                    use_taesd = any(
+                        node_data.get("inputs", {}).get("decoder") == "TAESD"
+                        for node_data in task[2].values()
+                        if isinstance(node_data, dict) and node_data.get("class_type") == OBSERVER_CLASS
+                    )
+                    entry = (task[3].get("client_id"), nodes, use_taesd)
+                    self._entries[prompt_id] = entry
+                if entry[0] and entry[1]:
+                    result.append((prompt_id,) + entry)
+            for prompt_id in [p for p in self._entries if p not in active]:
+                del self._entries[prompt_id]
+        return result
+
+
+observer_index = ObserverIndex()
+
+
 class LatentObserver:
     @classmethod
     def INPUT_TYPES(cls):
-        return {"required": {}}
+        # optional 保证旧工作流和 API 提示词（inputs 为空）仍能通过校验
+        return {
+            "optional": {
+                "max_edge": ("INT", {"default": 512, "min": 64, "max": 2048, "step": 64, "tooltip": "Longest preview edge in pixels"}),
+                "format": (list(PREVIEW_FORMATS), {"default": "JPEG", "tooltip": "Preview image format"}),
+                "quality": ("INT", {"default": 80, "min": 1, "max": 100, "tooltip": "Preview encode quality"}),
+                "decoder": (OBSERVER_DECODERS, {"default": "Latent2RGB", "tooltip": "Decoder used when global previews are off; TAESD needs the vae_approx files"}),
+            }
+        }
 
     RETURN_TYPES = ()
     FUNCTION = "observe_latents"
@@ -15,7 +253,7 @@ class LatentObserver:
 
     CATEGORY = "A1rSpace/Utils"
 
-    def observe_latents(self):
+    def observe_latents(self, max_edge=512, format="JPEG", quality=80, decoder="Latent2RGB"):
         return ()
 
 # Apply patch at module level to ensure it runs when the node is loaded
@@ -29,7 +267,19 @@ if not hasattr(latent_preview, "_original_prepare_callback"):
         # 标记是否是强制开启的预览
         forced_preview = False
 
-        # 如果没有获取到 (例如全局设置为 NoPreviews)，强制使用 Latent2RGB
+        # 每次采样只解析一次 observer 目标，逐步回调中只做发送
+        try:
+            targets = observer_index.targets(server.PromptServer.instance.prompt_queue.currently_running)
+        except Exception as e:
+            print(f"LatentObserver Error: {e}")
+            targets = []
+
+        # 如果没有获取到 (例如全局设置为 NoPreviews)，observer 选择 TAESD 时优先使用缓存的 TAESD
+        if previewer is None and any(target[3] for target in targets):
+            previewer = get_taesd_previewer(model.model.latent_format, model.load_device)
+            forced_preview = previewer is not None
+
+        # 否则强制使用 Latent2RGB
         if previewer is None:
             latent_format = model.model.latent_format
             if getattr(latent_format, "latent_rgb_factors", None) is not None:
@@ -37,60 +287,93 @@ if not hasattr(latent_preview, "_original_prepare_callback"):
                 previewer = latent_preview.Latent2RGBPreviewer(latent_format.latent_rgb_factors, bias)
                 forced_preview = True
 
+        # 强制开启的预览只服务于 observer，没有 observer 时不解码
+        if forced_preview and not targets:
+            previewer = None
+
         pbar = comfy.utils.ProgressBar(steps)
+        # 后台线程解码完成的标准预览，由采样线程在下一次回调时交给进度条
+        finished = {}
+        throttle = PreviewThrottle.from_settings()
+        worker = get_worker() if get_setting("Preview", "async", True) else None
+
+        # observer 只需要最大的预览尺寸；TAESD 输出为 latent 的 8 倍
+        max_edge = max((settings[0] for _, _, nodes, _ in targets for _, settings in nodes), default=0)
+        decoder_scale = 8 if hasattr(previewer, "taesd") else 1
+
+        def send_preview(step, total_steps, x0):
+            """
+            Decode x0, keep the standard preview and send it to observers.
+
+            May run on the preview worker, so the standard preview tuple is
+            only stored here: the sampling thread passes it to the progress
+            bar, whose hook checks for interrupts and needs the executing
+            node. Observers are sent with PromptServer's thread-safe send_bytes.
+            """
+            started = time.perf_counter()
+            try:
+                if forced_preview:
+                    image = previewer.decode_latent_to_preview(downscale_latent(x0, max_edge, decoder_scale))
+                else:
+                    preview_tuple = previewer.decode_latent_to_preview_image("JPEG", x0)
+                    image = preview_tuple[1]
+                    # 如果是强制开启的预览，不要发送给标准预览（避免影响全局设置）
+                    finished["preview"] = preview_tuple
+            except Exception:
+                return
+            finally:
+                throttle.record(started, time.perf_counter())
+
+            if not targets:
+                return
+
+            try:
+                s = server.PromptServer.instance
+                encoded = {}
+                for prompt_id, client_id, nodes, _ in targets:
+                    for node_id, settings in nodes:
+                        # 相同设置的 observer 共享一次编码
+                        if settings not in encoded:
+                            encoded[settings] = encode_preview(image, *settings)
+                        metadata = {
+                            "node_id": node_id,
+                            "prompt_id": prompt_id,
+                            "display_node_id": node_id,
+                            "real_node_id": node_id,
+                        }
+                        send_encoded_preview(s, encoded[settings], settings[1], metadata, client_id)
+            except Exception as e:
+                print(f"LatentObserver Error: {e}")
 
         def callback(step, x0, x, total_steps):
             if x0_output_dict is not None:
                 x0_output_dict["x0"] = x0
 
-            preview_tuple = None
-            if previewer:
-                try:
-                    preview_tuple = previewer.decode_latent_to_preview_image("JPEG", x0)
-                except Exception:
-                    pass
-            
-            # 如果是强制开启的预览，不要发送给标准进度条（避免影响全局设置）
-            if forced_preview:
-                pbar.update_absolute(step + 1, total_steps, None)
-            else:
-                pbar.update_absolute(step + 1, total_steps, preview_tuple)
+            # 预览图交给后台线程解码和发送
+            if previewer and throttle.should_preview(step, total_steps, time.perf_counter()):
+                if worker is not None:
+                    worker.submit(lambda: send_preview(step, total_steps, x0))
+                    # 最后一步等待后台线程，最终预览不会丢失
+                    if step + 1 >= total_steps:
+                        worker.wait_idle(timeout=5.0)
+                else:
+                    send_preview(step, total_steps, x0)
+
+            # 进度条只在采样线程上更新，附带最近完成的标准预览
+            pbar.update_absolute(step + 1, total_steps, finished.pop("preview", None))
+
+            if not targets:
+                return
 
             # 额外发送给 LatentObserver 节点
             try:
                 s = server.PromptServer.instance
-                # 遍历当前运行的任务
-                # currently_running 是 {task_id: (number, prompt_id, prompt, extra_data, outputs_to_execute)}
-                for task in s.prompt_queue.currently_running.values():
-                    prompt_id = task[1]
-                    prompt = task[2]
-                    extra_data = task[3]
-                    client_id = extra_data.get("client_id")
-
-                    if not client_id:
-                        continue
-
-                    # 查找所有 LatentObserver 节点
-                    for node_id, node_data in prompt.items():
-                        if node_data.get("class_type") == "A1r Latent Observer":
-                            # 发送进度条
-                            s.send_sync("progress", 
-                                {"value": step + 1, "max": total_steps, "node": node_id, "prompt_id": prompt_id}, 
-                                client_id)
-
-                            # 发送预览图
-                            if preview_tuple:
-                                metadata = {
-                                    "node_id": node_id,
-                                    "prompt_id": prompt_id,
-                                    "display_node_id": node_id,
-                                    "real_node_id": node_id,
-                                }
-                                s.send_sync(
-                                    BinaryEventTypes.PREVIEW_IMAGE_WITH_METADATA,
-                                    (preview_tuple, metadata),
-                                    client_id
-                                )
+                for prompt_id, client_id, nodes, _ in targets:
+                    for node_id, _ in nodes:
+                        # 发送进度条
+                        s.send_sync("progress", 
+                            {"value": step + 1, "max": total_steps, "node": node_id, "prompt_id": prompt_id}, 
+                            client_id)
             except Exception as e:
                 print(f"LatentObserver Error: {e}")
 
@@ -0,0 +1,74 @@
+"""
+Checks for the LoadImage decode paths in nodes/images/image_decode.py.
+
+Run from the plugin folder:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from nodes.images import image_decode  # noqa: E402
+
+ORIENTATIONS = range(1, 9)
+# Rows of 256 RGB pixels, so Pillow writes several strips per file
+SIZE = (256, 600)
+BOX = (37, 21, 90, 75)
+
+
+# What each EXIF orientation does to the stored [H, W, C] raster
+_ORIENT = {
+    1: lambda a: a,
+    2: lambda a: a[:, ::-1],
+    3: lambda a: a[::-1, ::-1],
+    4: lambda a: a[::-1],
+    5: lambda a: a.transpose(1, 0, 2),
+    6: lambda a: np.rot90(a, -1),
+    7: lambda a: a.transpose(1, 0, 2)[::-1, ::-1],
+    8: lambda a: np.rot90(a, 1),
+}
+
+
+def _write_tiff(path, orientation):
+    rng = np.random.default_rng(orientation)
+    pixels = rng.integers(0, 256, (SIZE[1], SIZE[0], 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path, compression="raw", tiffinfo={274: orientation})
+    return pixels
+
+
+@pytest.mark.parametrize("orientation", ORIENTATIONS)
+def test_full_decode_is_oriented(tmp_path, orientation):
+    path = str(tmp_path / f"orient_{orientation}.tif")
+    stored = _write_tiff(path, orientation)
+
+    expected = _ORIENT[orientation](stored)
+    assert np.array_equal(image_decode._decode_frames(path)[0][0], expected)
+    assert image_decode.probe_image(path)[:2] == (expected.shape[1], expected.shape[0])
+
+
+@pytest.mark.parametrize("orientation", ORIENTATIONS)
+def test_region_matches_full_decode(tmp_path, orientation):
+    path = str(tmp_path / f"orient_{orientation}.tif")
+    _write_tiff(path, orientation)
+
+    full = image_decode._decode_frames(path)[0][0]
+    x0, y0, x1, y1 = BOX
+    region = image_decode.decode_region(path, BOX)
+
+    assert region is not None, "striped TIFF should take the region path"
+    assert region[0].shape == full[y0:y1, x0:x1].shape
+    assert np.array_equal(region[0], full[y0:y1, x0:x1])
+
+
+@pytest.mark.parametrize("orientation", ORIENTATIONS)
+def test_box_mapping_round_trip(orientation):
+    size = (31, 17)
+    oriented = (2, 3, 9, 11) if orientation < 5 else (2, 3, 11, 9)
+    source = image_decode._source_box(oriented, orientation, size)
+    assert image_decode._oriented_box(source, orientation, size) == oriented
@@ -0,0 +1,50 @@
+"""
+Checks that chunked latent upscaling in nodes/common/latent_utils.py
+matches the unchunked resize.
+
+Run from the plugin folder:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+torch = pytest.importorskip("torch")
+
+from nodes.common import latent_utils  # noqa: E402
+
+# (input height, output height), including sizes that share no divisor
+SIZES = [(64, 96), (64, 128), (37, 101), (97, 64), (128, 131)]
+
+
+def _latent(batch, height, width=24, channels=4):
+    gen = torch.Generator().manual_seed(height * 1000 + batch)
+    return torch.randn((batch, channels, height, width), generator=gen)
+
+
+@pytest.mark.parametrize("in_height,height", SIZES)
+@pytest.mark.parametrize("cap_rows", [1, 7, 50])
+def test_nearest_stripes_match_full_resize(in_height, height, cap_rows):
+    samples = _latent(2, in_height)
+    width = 40
+    cap = cap_rows * samples.shape[0] * samples.shape[1] * width * samples.element_size()
+
+    full = torch.nn.functional.interpolate(samples, size=(height, width), mode="nearest-exact")
+    striped = latent_utils._upscale_rows(samples, width, height, cap)
+    assert torch.equal(striped, full)
+
+
+@pytest.mark.parametrize("method", ["nearest-exact", "bilinear", "bicubic", "area", "bislerp"])
+@pytest.mark.parametrize("in_height,height", SIZES)
+def test_chunked_upscale_matches_unchunked(method, in_height, height):
+    comfy_utils = pytest.importorskip("comfy.utils")
+    samples = _latent(3, in_height)
+    # Every output sample is over 1 MB, forcing the smallest chunks each mode allows
+    width = 1024
+
+    full = comfy_utils.common_upscale(samples, width, height, method, "disabled")
+    chunked = latent_utils.chunked_upscale(samples, width, height, method, "disabled", max_chunk_mb=1)
+    assert torch.equal(chunked, full)
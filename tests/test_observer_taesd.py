@@ -0,0 +1,57 @@
+"""
+Checks that the Latent Observer TAESD decoder matches ComfyUI's own
+TAESD previewer on the same sampler x0.
+
+Needs a ComfyUI checkout on sys.path; skipped otherwise. Run from the
+plugin folder:
+    python -m pytest tests
+"""
+import os
+import sys
+import types
+import importlib
+
+import pytest
+
+torch = pytest.importorskip("torch")
+np = pytest.importorskip("numpy")
+latent_preview = pytest.importorskip("latent_preview")
+pytest.importorskip("server")
+comfy_sd = pytest.importorskip("comfy.sd")
+taesd_module = pytest.importorskip("comfy.taesd.taesd")
+latent_formats = pytest.importorskip("comfy.latent_formats")
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _plugin_module(name):
+    # ComfyUI's nodes.py shadows the plugin's nodes/ folder, so mount the
+    # plugin under its own package name without running its __init__
+    if "a1rspace_under_test" not in sys.modules:
+        package = types.ModuleType("a1rspace_under_test")
+        package.__path__ = [ROOT]
+        sys.modules["a1rspace_under_test"] = package
+    return importlib.import_module("a1rspace_under_test." + name)
+
+
+def test_observer_taesd_matches_comfy_previewer(monkeypatch):
+    observer = _plugin_module("nodes.utils.util_observer")
+    model_loader = _plugin_module("nodes.common.model_loader")
+
+    torch.manual_seed(0)
+    reference = taesd_module.TAESD(latent_channels=4).eval()
+    # What ModelLoaderBase.load_taesd returns for "taesd": weights plus the raw-latent scale
+    sd = {k: v.clone() for k, v in reference.state_dict().items()}
+    sd["vae_scale"] = torch.tensor(0.18215)
+    sd["vae_shift"] = torch.tensor(0.0)
+    monkeypatch.setattr(model_loader.ModelLoaderBase, "load_taesd", staticmethod(lambda name: sd))
+
+    previewer = observer.get_taesd_previewer(latent_formats.SD15(), torch.device("cpu"))
+    assert previewer is not None
+
+    x0 = torch.randn((1, 4, 16, 16), generator=torch.Generator().manual_seed(1))
+    expected = latent_preview.TAESDPreviewerImpl(reference).decode_latent_to_preview(x0)
+    actual = previewer.decode_latent_to_preview(x0)
+
+    diff = np.abs(np.asarray(actual, dtype=np.int16) - np.asarray(expected, dtype=np.int16))
+    assert diff.max() <= 1
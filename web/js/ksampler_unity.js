@@ -12,6 +12,12 @@ app.registerExtension({
             // 获取小部件
             const modeWidget = this.widgets?.find(w => w.name === "mode");
             const denoiseWidget = this.widgets?.find(w => w.name === "denoise");
+            const hiresWidgets = ["hires_steps", "hires_denoise"]
+                .map(name => this.widgets?.find(w => w.name === name))
+                .filter(Boolean);
+            const tiledWidgets = ["tiled", "tile_size", "tile_overlap"]
+                .map(name => this.widgets?.find(w => w.name === name))
+                .filter(Boolean);
 
             if (!modeWidget) return result;
 
@@ -99,8 +105,25 @@ app.registerExtension({
                     
                     // denoise 可编辑
                     setWidgetReadonly(denoiseWidget, false);
+
+                } else if (mode === "hires fix") {
+                    // Hires Fix: 需要 width, height, batch_size, upscale_method, upscale_by
+                    removeInputByNames(["pixels", "vae", "latent"]);
+                    addInput(this, "width", "INT");
+                    addInput(this, "height", "INT");
+                    addInput(this, "batch_size", "INT");
+                    addInput(this, "upscale_method", "UPSCALEMETHOD");
+                    addInput(this, "upscale_by", "FLOAT");
+
+                    // 第一遍固定为 1.0，第二遍使用 hires_denoise
+                    setWidgetReadonly(denoiseWidget, true);
                 }
 
+                // hires 参数仅在 hires fix 模式下可编辑
+                hiresWidgets.forEach(w => setWidgetReadonly(w, mode !== "hires fix"));
+                // 分块采样仅用于 latent upscale 和 hires fix 第二遍
+                tiledWidgets.forEach(w => setWidgetReadonly(w, mode !== "latent upscale" && mode !== "hires fix"));
+
                 // 触发节点重新计算尺寸和重绘
                 this.setSize(this.computeSize());
                 this.setDirtyCanvas(true, true);